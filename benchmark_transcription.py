@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos engines de transcrição locais: Whisper (PyTorch) x faster-whisper (int8)
+
+Mede o tempo de cada engine (sem cache) e o fator de tempo real (RTF =
+tempo de processamento / duração do áudio), além da concordância do texto
+entre os engines.
+
+Exemplo:
+    python benchmark_transcription.py temp/download_xxx.mp3 --runs 3
+"""
+
+import asyncio
+import argparse
+import difflib
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.transcription_service import transcription_service, WhisperModel
+from utils.audio_converter import audio_converter
+
+ENGINES = {
+    "local": transcription_service._transcribe_with_local_whisper,
+    "local_fast": transcription_service._transcribe_with_fast_whisper,
+}
+
+
+async def benchmark_file(filepath: str, runs: int):
+    """Executa cada engine `runs` vezes no arquivo"""
+    info = await audio_converter.get_audio_info(filepath)
+    duration = info.get('duration') if info else None
+
+    print(f"\n🎵 {filepath} ({duration:.1f}s)" if duration else f"\n🎵 {filepath}")
+    print("-" * 60)
+
+    texts = {}
+    for name, transcribe in ENGINES.items():
+        if name == "local_fast" and WhisperModel is None:
+            print(f"⚠️ {name}: faster-whisper não instalado (pip install faster-whisper)")
+            continue
+
+        # Primeira execução carrega o modelo e não entra na medição
+        result = await transcribe(filepath)
+        texts[name] = result['full_text']
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await transcribe(filepath)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        avg = sum(timings) / len(timings)
+        rtf = f" | RTF {best / duration:.3f}" if duration else ""
+        print(f"⏱️ {name:<11} melhor {best:6.2f}s | média {avg:6.2f}s{rtf} | {len(result['segments'])} segmentos")
+
+    if len(texts) == 2:
+        similarity = difflib.SequenceMatcher(None, texts["local"].lower(), texts["local_fast"].lower()).ratio()
+        print(f"📝 Concordância do texto: {similarity:.1%}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos engines de transcrição locais")
+    parser.add_argument("files", nargs="+", help="Arquivos de áudio")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções medidas por engine")
+    args = parser.parse_args()
+
+    print("🎤 ShortTune API - Benchmark de Transcrição")
+    print("=" * 60)
+
+    for filepath in args.files:
+        if not os.path.exists(filepath):
+            print(f"❌ Arquivo não encontrado: {filepath}")
+            continue
+        await benchmark_file(filepath, max(args.runs, 1))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
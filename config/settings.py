@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     openai_api_key: Optional[str] = None
+    openai_base_url: Optional[str] = None  # None = API oficial
+    openai_max_concurrency: int = 4
+    openai_max_retries: int = 3
+    openai_timeout_seconds: float = 120.0
+    openai_upload_bitrate: str = "24k"  # vazio = envia o arquivo original
     
     # Rate Limiting
     rate_limit_requests: int = 10
@@ -21,6 +26,60 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 100
     cleanup_interval_hours: int = 1
     
+    # Download Limits
+    max_duration_seconds: int = 900
+    max_download_seconds: int = 180
+    partial_index_file: str = "cache/partial_downloads.json"
+    metadata_cache_ttl_seconds: int = 3600
+    metadata_cache_max_entries: int = 1000
+    download_cache_ttl_seconds: int = 1800
+    download_index_dir: str = "cache/downloads"
+    files_cache_max_age: int = 3600
+    files_accel_redirect_prefix: Optional[str] = None
+    
+    # yt-dlp
+    ytdlp_pool_size: int = 4
+    ytdlp_cache_dir: str = "cache/yt-dlp"
+    
+    # Bandwidth (0 = sem limite)
+    bandwidth_global_limit_kbps: int = 0
+    bandwidth_per_download_kbps: int = 0
+    bandwidth_max_active_downloads: int = 6
+    bandwidth_small_download_mb: int = 10
+    
+    # Batch Download
+    batch_max_items: int = 50
+    batch_max_concurrency: int = 3
+    batch_job_ttl_seconds: int = 3600
+    
+    # Prefetch (pré-download dos primeiros resultados de busca)
+    prefetch_enabled: bool = False
+    prefetch_top_n: int = 3
+    prefetch_format: str = "mp3"
+    prefetch_queue_size: int = 20
+    prefetch_rate_limit_kbps: int = 512
+    prefetch_disk_budget_mb: int = 500
+    prefetch_max_cpu_percent: float = 70.0
+    
+    # Transcription
+    transcript_cache_file: str = "cache/transcripts.db"
+    language_cache_file: str = "cache/languages.db"
+    whisper_model: str = "base"
+    whisper_warmup_on_startup: bool = True
+    transcription_max_concurrency: int = 0  # 0 = automático (1 a cada 4 núcleos)
+    transcription_max_queue: int = 8
+    transcription_chunk_workers: int = 1  # 1 = desativa blocos; 0 = um processo por núcleo
+    transcription_chunk_min_seconds: float = 120.0
+    transcription_chunk_seconds: float = 45.0
+    transcription_chunk_overlap_seconds: float = 1.5
+    transcription_stream_first_chunk_seconds: float = 10.0
+    transcription_window_padding_seconds: float = 1.0
+    pcm_cache_max_mb: int = 512
+    transcription_batch_size: int = 0  # 0/1 = sem micro-lotes
+    transcription_batch_max_wait_ms: int = 20
+    fast_whisper_compute_type: str = "int8"
+    fast_whisper_cpu_threads: int = 0  # 0 = núcleos divididos entre as vagas
+    
     # Logging
     log_level: str = "INFO"
     log_file: str = "logs/app.log"
@@ -38,4 +97,5 @@ settings = Settings()
 
 # Ensure required directories exist
 os.makedirs(settings.temp_dir, exist_ok=True)
+os.makedirs(settings.ytdlp_cache_dir, exist_ok=True)
 os.makedirs(os.path.dirname(settings.log_file), exist_ok=True)
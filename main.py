@@ -15,9 +15,13 @@ from routers import (
     download_router, 
     transcribe_router,
     cut_router,
-    health_router
+    health_router,
+    files_router
 )
 from utils import start_cleanup_task
+from services.download_service import download_service
+from services.prefetch_service import prefetch_service
+from services.transcription_service import transcription_service
 
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -147,6 +151,7 @@ app.include_router(search_router)
 app.include_router(download_router)
 app.include_router(transcribe_router)
 app.include_router(cut_router)
+app.include_router(files_router)
 
 # Adicionar rate limiting às rotas
 @app.get("/")
@@ -171,9 +176,23 @@ async def startup_event():
     logger.info(f"Rate limiting: {settings.rate_limit_requests}/{settings.rate_limit_window}s")
     
     # Inicia tarefa de limpeza automática
-    asyncio.create_task(start_cleanup_task())
+    asyncio.create_task(start_cleanup_task(download_service.get_pinned_files))
     logger.info("Tarefa de limpeza automática iniciada")
     
+    # Pré-inicializa instâncias do yt-dlp (extratores carregados)
+    loop = asyncio.get_event_loop()
+    loop.run_in_executor(None, download_service.ytdlp_pool.warm_up)
+    
+    # Carrega e aquece o modelo Whisper em background (readiness em /ready)
+    if settings.whisper_warmup_on_startup:
+        asyncio.create_task(transcription_service.warm_up())
+        logger.info(f"Aquecimento do Whisper iniciado (modelo: {settings.whisper_model})")
+    
+    # Pré-download opcional dos resultados de busca
+    if settings.prefetch_enabled:
+        asyncio.create_task(prefetch_service.run())
+        logger.info(f"Pré-download habilitado (top {settings.prefetch_top_n} resultados)")
+    
     logger.info("ShortTune API iniciada com sucesso!")
 
 @app.on_event("shutdown")
@@ -181,6 +200,15 @@ async def shutdown_event():
     """Eventos executados no shutdown da aplicação"""
     logger.info("ShortTune API finalizando...")
     
+    # Fecha instâncias do yt-dlp
+    download_service.ytdlp_pool.close()
+    
+    # Encerra pool de processos de transcrição
+    transcription_service.shutdown()
+    
+    # Fecha conexões com a API da OpenAI
+    await transcription_service.close_openai_client()
+    
     # Aqui você pode adicionar lógica de limpeza
     # Por exemplo: fechar conexões, salvar estado, etc.
     
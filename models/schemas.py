@@ -6,13 +6,28 @@ from enum import Enum
 class AudioFormat(str, Enum):
     MP3 = "mp3"
     WAV = "wav"
+    OPUS = "opus"
+    M4A = "m4a"
+    NATIVE = "native"
+
+
+class AudioQuality(str, Enum):
+    TRANSCRIBE = "transcribe"
+    PREVIEW = "preview"
+    MASTER = "master"
 
 
 class TranscriptionEngine(str, Enum):
     LOCAL = "local"
+    LOCAL_FAST = "local_fast"
     OPENAI = "openai"
 
 
+class TranscriptionGranularity(str, Enum):
+    SEGMENT = "segment"
+    WORD = "word"
+
+
 class TranslationEngine(str, Enum):
     AI_MODEL = "ai_model"
     DEEP_TRANSLATOR = "deep_translator"
@@ -41,24 +56,86 @@ class SearchResponse(BaseModel):
 class DownloadRequest(BaseModel):
     video_id: str = Field(..., description="ID do vídeo do YouTube")
     format: AudioFormat = Field(AudioFormat.MP3, description="Formato do áudio")
+    accept_formats: Optional[List[AudioFormat]] = Field(
+        None,
+        description="Formatos alternativos aceitos; o servidor escolhe um que evite transcodificação"
+    )
+    quality: AudioQuality = Field(
+        AudioQuality.MASTER,
+        description="Qualidade: 'transcribe' (opus de baixo bitrate), 'preview' (~128 kbps) ou 'master' (melhor disponível)"
+    )
+    download_id: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$",
+        description="ID para acompanhar o progresso em /download/progress/{download_id} (gerado se omitido)"
+    )
 
 
 class DownloadResponse(BaseModel):
     success: bool
+    download_id: Optional[str] = Field(None, description="ID do download (acompanhamento de progresso)")
     filepath: str = Field(..., description="Caminho do arquivo baixado")
+    file_id: Optional[str] = Field(None, description="ID do arquivo para GET /files/{file_id}")
     title: str = Field(..., description="Título da música")
     artist: Optional[str] = Field(None, description="Nome do artista")
     duration: Optional[float] = Field(None, description="Duração em segundos")
     format: AudioFormat
+    codec: Optional[str] = Field(None, description="Codec de áudio do arquivo entregue")
+    quality: Optional[AudioQuality] = Field(None, description="Qualidade do arquivo entregue")
+    transcoded: bool = Field(False, description="Indica se houve transcodificação")
     file_size: int = Field(..., description="Tamanho do arquivo em bytes")
 
 
+class BatchDownloadRequest(BaseModel):
+    video_ids: Optional[List[str]] = Field(None, description="IDs dos vídeos do YouTube")
+    playlist_id: Optional[str] = Field(None, description="ID de uma playlist do YouTube (alternativa a video_ids)")
+    format: AudioFormat = Field(AudioFormat.MP3, description="Formato do áudio")
+    accept_formats: Optional[List[AudioFormat]] = Field(
+        None,
+        description="Formatos alternativos aceitos; o servidor escolhe um que evite transcodificação"
+    )
+    quality: AudioQuality = Field(AudioQuality.MASTER, description="Qualidade: 'transcribe', 'preview' ou 'master'")
+    wait: bool = Field(True, description="Aguarda todos os downloads (true) ou retorna um handle do lote (false)")
+
+
+class BatchDownloadItem(BaseModel):
+    video_id: str
+    status: str = Field(..., description="pending, downloading, completed ou failed")
+    filepath: Optional[str] = None
+    file_id: Optional[str] = None
+    title: Optional[str] = None
+    artist: Optional[str] = None
+    duration: Optional[float] = None
+    format: Optional[AudioFormat] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = Field(None, description="Código do erro, se falhou")
+    message: Optional[str] = Field(None, description="Mensagem do erro, se falhou")
+
+
+class BatchDownloadResponse(BaseModel):
+    success: bool
+    batch_id: str = Field(..., description="ID do lote (consulta em /download/batch/{batch_id})")
+    status: str = Field(..., description="running ou completed")
+    total: int
+    completed: int
+    failed: int
+    items: List[BatchDownloadItem]
+
+
 # Transcription Models
+class TranscriptionWord(BaseModel):
+    start: float = Field(..., description="Tempo de início da palavra em segundos")
+    end: float = Field(..., description="Tempo de fim da palavra em segundos")
+    word: str = Field(..., description="Palavra transcrita")
+    probability: Optional[float] = Field(None, description="Confiança do modelo na palavra (0 a 1)")
+
+
 class TranscriptionSegment(BaseModel):
     start: float = Field(..., description="Tempo de início em segundos")
     end: float = Field(..., description="Tempo de fim em segundos")
     text: str = Field(..., description="Texto transcrito")
     translation: Optional[str] = Field(None, description="Tradução do texto para o idioma de destino")
+    words: Optional[List[TranscriptionWord]] = Field(None, description="Palavras com timestamps (granularity=word)")
 
 
 class TranscriptionResponse(BaseModel):
@@ -87,6 +164,7 @@ class CutRequest(BaseModel):
 class CutResponse(BaseModel):
     success: bool
     filepath: str = Field(..., description="Caminho do arquivo cortado")
+    file_id: Optional[str] = Field(None, description="ID do arquivo para GET /files/{file_id}")
     original_duration: float = Field(..., description="Duração original em segundos")
     cut_duration: float = Field(..., description="Duração do corte em segundos")
     file_size: int = Field(..., description="Tamanho do arquivo cortado em bytes")
@@ -3,3 +3,4 @@ from .download import router as download_router
 from .transcribe import router as transcribe_router
 from .cut import router as cut_router
 from .health import router as health_router
+from .files import router as files_router
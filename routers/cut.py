@@ -100,6 +100,7 @@ async def cut_audio(
         response = CutResponse(
             success=True,
             filepath=result['filepath'],
+            file_id=file_manager.get_file_id(result['filepath']),
             original_duration=result['original_duration'],
             cut_duration=result['cut_duration'],
             file_size=result['file_size']
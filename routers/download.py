@@ -1,26 +1,35 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from models.schemas import DownloadRequest, DownloadResponse, AudioFormat
-from services.download_service import download_service
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from models.schemas import (
+    DownloadRequest, DownloadResponse, AudioFormat,
+    BatchDownloadRequest, BatchDownloadResponse
+)
+from services.download_service import download_service, DownloadLimitExceeded
+from services.batch_download_service import batch_download_service
+from config.settings import settings
 from utils.file_manager import file_manager
+from utils.progress_tracker import progress_tracker
 from config.logging import logger
+import json
+import uuid
 
 router = APIRouter(prefix="/download", tags=["Download"])
 
-
-async def cleanup_file(filepath: str):
-    """Task em background para limpeza de arquivo"""
-    try:
-        import asyncio
-        await asyncio.sleep(3600)  # Aguarda 1 hora
-        file_manager.delete_file(filepath)
-    except:
-        pass
+# Status HTTP para rejeições feitas a partir dos metadados
+METADATA_REJECTION_STATUS = {
+    "video_private": 403,
+    "video_requires_auth": 403,
+    "age_restricted": 403,
+    "video_unavailable": 404,
+    "live_stream": 400,
+    "duration_too_long": 413,
+    "file_too_large": 413
+}
 
 
 @router.post("/", response_model=DownloadResponse)
 async def download_audio(
-    request: DownloadRequest,
-    background_tasks: BackgroundTasks
+    request: DownloadRequest
 ):
     """
     Baixa áudio de uma música do YouTube
@@ -29,13 +38,32 @@ async def download_audio(
     ```json
     {
         "video_id": "abc123",
-        "format": "mp3"
+        "format": "mp3",
+        "accept_formats": ["opus", "m4a"],
+        "quality": "master",
+        "download_id": "meu-download-1"
     }
     ```
     
+    **Progresso:**
+    - Informe um `download_id` e abra `GET /download/progress/{download_id}`
+      (Server-Sent Events) para receber bytes, velocidade, ETA e estágios
+    
     **Formatos suportados:**
     - `mp3`: Formato MP3 (padrão)
     - `wav`: Formato WAV (maior qualidade)
+    - `opus`: Opus, entregue sem transcodificação quando disponível
+    - `m4a`: AAC/M4A, entregue sem transcodificação quando disponível
+    - `native`: Stream original do YouTube, sem transcodificação
+    
+    **Qualidades (`quality`):**
+    - `transcribe`: stream opus de baixo bitrate (suficiente para transcrição)
+    - `preview`: stream de ~128 kbps
+    - `master`: melhor stream disponível (padrão)
+    
+    **Negociação:**
+    - Com `accept_formats`, o servidor escolhe um formato aceito que
+      evite transcodificação; `transcoded` na resposta indica se houve
     
     **Retorna:**
     - Caminho do arquivo baixado
@@ -43,12 +71,18 @@ async def download_audio(
     - Informações do arquivo (tamanho, formato)
     
     **Considerações:**
-    - Arquivos são automaticamente removidos após 1 hora
+    - Arquivos são removidos pela limpeza automática após CLEANUP_INTERVAL_HOURS (exceto os fixados pelo warm_cache.py)
     - Tamanho máximo: 100MB
+    - Duração máxima: 15 minutos (configurável)
+    - Vídeos privados, com restrição de idade ou grandes demais são
+      rejeitados pelos metadados, antes do download
     - Apenas para uso educacional e preview
     """
+    download_id = request.download_id or uuid.uuid4().hex
+    
     try:
-        logger.info(f"Download solicitado: {request.video_id} (formato: {request.format.value})")
+        logger.info(f"Download solicitado: {request.video_id} (formato: {request.format.value}, id: {download_id})")
+        progress_tracker.start(download_id, video_id=request.video_id)
         
         # Valida video_id
         if not request.video_id or len(request.video_id) < 5:
@@ -60,8 +94,47 @@ async def download_audio(
                 }
             )
         
-        # Executa download
-        result = await download_service.download_audio(request.video_id, request.format)
+        # Verifica metadados antes de baixar (rejeição antecipada)
+        progress_tracker.update(download_id, stage="metadata")
+        try:
+            metadata = await download_service.get_video_metadata(request.video_id)
+        except Exception as e:
+            metadata = None
+            logger.warning(f"Metadados indisponíveis para {request.video_id}, seguindo com download: {e}")
+        
+        # Escolhe formato que evite transcodificação, se o cliente aceitar
+        target_format = download_service.negotiate_format(metadata, request.format, request.accept_formats)
+        if target_format != request.format:
+            logger.info(f"Formato negociado: {request.format.value} -> {target_format.value}")
+        
+        if metadata:
+            is_valid, error_code, error_msg = download_service.validate_metadata(metadata, target_format)
+            if not is_valid:
+                logger.info(f"Download rejeitado pelos metadados: {request.video_id} ({error_code})")
+                raise HTTPException(
+                    status_code=METADATA_REJECTION_STATUS.get(error_code, 400),
+                    detail={
+                        "error": error_code,
+                        "message": error_msg
+                    }
+                )
+        
+        # Executa download (abortado durante a transferência se exceder limites)
+        try:
+            result = await download_service.download_audio(
+                request.video_id,
+                target_format,
+                quality=request.quality,
+                download_id=download_id
+            )
+        except DownloadLimitExceeded as e:
+            raise HTTPException(
+                status_code=413 if e.error_code == "file_too_large" else 504,
+                detail={
+                    "error": e.error_code,
+                    "message": e.message
+                }
+            )
         
         if not result:
             raise HTTPException(
@@ -83,26 +156,40 @@ async def download_audio(
                 }
             )
         
-        # Agenda limpeza do arquivo
-        background_tasks.add_task(cleanup_file, result['filepath'])
+        # Sem remoção por requisição: o arquivo segue no cache de downloads e a tarefa
+        # de limpeza automática o remove ao expirar (preservando os fixados pelo warm_cache.py)
         
         response = DownloadResponse(
             success=True,
+            download_id=download_id,
             filepath=result['filepath'],
+            file_id=file_manager.get_file_id(result['filepath']),
             title=result['title'],
             artist=result['artist'],
             duration=result['duration'],
             format=result['format'],
+            codec=result.get('codec'),
+            quality=result.get('quality'),
+            transcoded=result.get('transcoded', False),
             file_size=result['file_size']
         )
         
+        progress_tracker.update(
+            download_id,
+            stage="completed",
+            filepath=result['filepath'],
+            file_size=result['file_size']
+        )
         logger.info(f"Download concluído: {result['filepath']}")
         return response
         
-    except HTTPException:
+    except HTTPException as e:
+        error = e.detail.get("error") if isinstance(e.detail, dict) else str(e.detail)
+        progress_tracker.update(download_id, stage="failed", error=error)
         raise
     except Exception as e:
         logger.error(f"Erro no download: {e}")
+        progress_tracker.update(download_id, stage="failed", error="download_error")
         raise HTTPException(
             status_code=500,
             detail={
@@ -113,6 +200,158 @@ async def download_audio(
         )
 
 
+def build_batch_response(job: dict) -> BatchDownloadResponse:
+    """Monta resposta de um lote de downloads"""
+    return BatchDownloadResponse(
+        success=True,
+        batch_id=job['batch_id'],
+        status=job['status'],
+        total=len(job['items']),
+        completed=batch_download_service.count_items(job, 'completed'),
+        failed=batch_download_service.count_items(job, 'failed'),
+        items=job['items']
+    )
+
+
+@router.post("/batch", response_model=BatchDownloadResponse)
+async def download_batch(request: BatchDownloadRequest):
+    """
+    Baixa vários áudios em uma única requisição (lista de vídeos ou playlist)
+    
+    **Body:**
+    ```json
+    {
+        "video_ids": ["abc123", "def456"],
+        "format": "mp3",
+        "wait": true
+    }
+    ```
+    ou
+    ```json
+    {
+        "playlist_id": "PL123...",
+        "format": "opus",
+        "wait": false
+    }
+    ```
+    
+    **Comportamento:**
+    - Downloads executados em paralelo com número limitado de workers
+    - IDs duplicados e vídeos já baixados (cache) não são baixados novamente
+    - `wait=true`: retorna resultado de cada item ao final
+    - `wait=false`: retorna imediatamente o `batch_id`; consulte
+      `GET /download/batch/{batch_id}`
+    
+    **Limites:**
+    - Máximo de 50 vídeos por lote (configurável)
+    """
+    try:
+        if not request.video_ids and not request.playlist_id:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "empty_batch",
+                    "message": "Informe video_ids ou playlist_id"
+                }
+            )
+        
+        if request.video_ids and len(request.video_ids) > settings.batch_max_items:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "too_many_items",
+                    "message": f"Máximo de {settings.batch_max_items} vídeos por lote"
+                }
+            )
+        
+        video_ids = await batch_download_service.resolve_video_ids(request.video_ids, request.playlist_id)
+        video_ids = video_ids[:settings.batch_max_items]
+        
+        if not video_ids:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "error": "no_videos_found",
+                    "message": "Nenhum vídeo encontrado para o lote"
+                }
+            )
+        
+        logger.info(f"Download em lote solicitado: {len(video_ids)} vídeos (formato: {request.format.value})")
+        job = batch_download_service.create_job(
+            video_ids, request.format, request.accept_formats, request.quality
+        )
+        
+        if request.wait:
+            await batch_download_service.run_job(job)
+        else:
+            batch_download_service.start_job(job)
+        
+        return build_batch_response(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro no download em lote: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "batch_download_error",
+                "message": "Erro interno no download em lote",
+                "details": str(e)
+            }
+        )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchDownloadResponse)
+async def get_batch_status(batch_id: str):
+    """
+    Consulta o andamento de um lote de downloads
+    
+    **Retorna:**
+    - Status do lote e resultado de cada item
+    """
+    job = batch_download_service.get_job(batch_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "batch_not_found",
+                "message": "Lote não encontrado ou expirado"
+            }
+        )
+    
+    return build_batch_response(job)
+
+
+@router.get("/progress/{download_id}")
+async def download_progress(download_id: str):
+    """
+    Acompanha o progresso de um download via Server-Sent Events
+    
+    **Eventos (`event: progress`):**
+    - `stage`: queued, metadata, downloading, downloaded, converting, completed, failed
+    - `downloaded_bytes`, `total_bytes`, `speed` (bytes/s), `eta` (s)
+    
+    O stream é encerrado quando o download termina (completed/failed).
+    Pode ser aberto antes do `POST /download` usando o mesmo `download_id`.
+    """
+    async def event_stream():
+        async for event in progress_tracker.subscribe(download_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/formats")
 async def get_supported_formats():
     """
@@ -132,6 +371,21 @@ async def get_supported_formats():
                 "value": "wav",
                 "name": "WAV",
                 "description": "Alta qualidade, arquivo maior"
+            },
+            {
+                "value": "opus",
+                "name": "Opus",
+                "description": "Codec nativo do YouTube, sem transcodificação quando disponível"
+            },
+            {
+                "value": "m4a",
+                "name": "M4A (AAC)",
+                "description": "AAC nativo do YouTube, sem transcodificação quando disponível"
+            },
+            {
+                "value": "native",
+                "name": "Nativo",
+                "description": "Stream original (opus/webm ou aac/m4a), sem transcodificação"
             }
         ]
     }
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Request
+from utils.file_manager import file_manager
+from utils.file_response import build_file_response
+from config.settings import settings
+from config.logging import logger
+
+router = APIRouter(prefix="/files", tags=["Files"])
+
+
+@router.api_route("/{file_id}", methods=["GET", "HEAD"])
+async def get_file(file_id: str, request: Request):
+    """
+    Serve arquivo de áudio gerado por /download ou /cut
+
+    **Parâmetros:**
+    - **file_id**: ID do arquivo (campo `file_id` das respostas de /download e /cut)
+
+    **Recursos:**
+    - Requisições parciais (`Range: bytes=...`) com resposta 206, para seek e retomada
+    - `ETag`/`Last-Modified` com respostas 304 para requisições condicionais
+    - `Cache-Control` privado
+    - Envio zero-copy: via `X-Accel-Redirect` do nginx quando configurado
+      (`FILES_ACCEL_REDIRECT_PREFIX`), ou sendfile do servidor ASGI quando suportado
+
+    **Exemplo:**
+    ```
+    GET /files/download_abc123_20240101_120000_000000.mp3
+    Range: bytes=0-1048575
+    ```
+    """
+    filepath = file_manager.resolve_file_id(file_id)
+    if not filepath:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "file_not_found",
+                "message": "Arquivo não encontrado ou expirado"
+            }
+        )
+
+    try:
+        return build_file_response(
+            request,
+            filepath,
+            cache_max_age=settings.files_cache_max_age,
+            accel_redirect_prefix=settings.files_accel_redirect_prefix
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "file_not_found",
+                "message": "Arquivo não encontrado ou expirado"
+            }
+        )
+    except Exception as e:
+        logger.error(f"Erro ao servir arquivo {file_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "file_serving_error",
+                "message": "Erro ao servir arquivo",
+                "details": str(e)
+            }
+        )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from models.schemas import HealthResponse
-from services import transcription_service
+from services import transcription_service, prefetch_service, download_service
 from config.settings import settings
 import psutil
 import platform
@@ -29,14 +30,13 @@ async def health_check():
             services_status["youtube_music"] = "unavailable"
         
         # Whisper Local
-        try:
-            services_status["whisper_local"] = "available"
-        except:
-            services_status["whisper_local"] = "unavailable"
+        services_status["whisper_local"] = transcription_service.model_status
         
         # OpenAI API
         if settings.openai_api_key:
             services_status["openai_api"] = "configured"
+            if transcription_service.openai_client is not None:
+                services_status["openai_uploads"] = transcription_service.openai_client.get_stats()
         else:
             services_status["openai_api"] = "not_configured"
         
@@ -51,6 +51,18 @@ async def health_check():
         available_engines = await transcription_service.get_available_engines()
         services_status["transcription_engines"] = available_engines
         
+        # Fila de transcrição local
+        services_status["transcription_queue"] = transcription_service.admission.get_stats()
+        services_status["pcm_cache"] = transcription_service.pcm_cache.get_stats()
+        if transcription_service.batcher is not None:
+            services_status["transcription_batching"] = transcription_service.batcher.get_stats()
+        
+        # Pré-download em background
+        services_status["prefetch"] = prefetch_service.get_stats()
+        
+        # Agendador de banda dos downloads
+        services_status["bandwidth"] = download_service.bandwidth_scheduler.get_stats()
+        
         # Informações do sistema
         system_info = {
             "platform": platform.system(),
@@ -85,6 +97,27 @@ async def health_check():
         )
 
 
+@router.get("/ready")
+async def readiness_check():
+    """
+    Verifica se a API está pronta para receber tráfego
+    
+    **Retorna:**
+    - 200 quando o modelo Whisper local está carregado
+    - 503 enquanto o modelo carrega (ou se o carregamento falhou)
+    """
+    checks = {
+        "whisper_local": transcription_service.model_status
+    }
+    if settings.whisper_warmup_on_startup and not transcription_service.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"ready": False, "checks": checks, "error": transcription_service.model_error}
+        )
+    
+    return {"ready": True, "checks": checks}
+
+
 @router.get("/")
 async def root():
     """
@@ -101,11 +134,13 @@ async def root():
         "documentation": "/docs",
         "redoc": "/redoc",
         "health": "/health",
+        "ready": "/ready",
         "endpoints": {
             "search": "/search - Buscar músicas no YouTube Music",
             "download": "/download - Baixar áudio de músicas",
             "transcribe": "/transcribe - Transcrever áudio com timestamps",
-            "cut": "/cut - Cortar trechos de áudio"
+            "cut": "/cut - Cortar trechos de áudio",
+            "files": "/files/{file_id} - Servir arquivos gerados (suporta Range)"
         },
         "legal_notice": "Esta API é destinada apenas para fins educacionais e de preview. Respeite os direitos autorais e Termos de Serviço do YouTube."
     }
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from models.schemas import SearchRequest, SearchResponse, ErrorResponse
 from services.youtube_music_service import youtube_music_service
+from services.prefetch_service import prefetch_service
 from config.logging import logger
 
 router = APIRouter(prefix="/search", tags=["Search"])
@@ -38,6 +39,9 @@ async def search_music(
             total_results=len(results)
         )
         
+        # Pré-download opcional dos primeiros resultados
+        prefetch_service.schedule([r.video_id for r in results])
+        
         logger.info(f"Busca concluída: {len(results)} resultados para '{query}'")
         return response
         
@@ -72,6 +76,7 @@ async def search_music_post(request: SearchRequest):
         logger.info(f"Busca POST solicitada: '{request.query}'")
         
         results = await youtube_music_service.search_songs(request.query)
+        prefetch_service.schedule([r.video_id for r in results])
         
         response = SearchResponse(
             results=results,
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query, BackgroundTasks
-from typing import Optional
-from models.schemas import TranscriptionResponse, TranscriptionEngine, TranslationEngine
+from fastapi.responses import StreamingResponse
+from typing import Optional, Tuple
+import asyncio
+import json
+from models.schemas import TranscriptionResponse, TranscriptionEngine, TranscriptionGranularity, TranslationEngine
 from services.transcription_service import transcription_service
+from utils.admission import AdmissionRejected
 from utils.file_manager import file_manager
+from utils.audio_converter import audio_converter
 from config.settings import settings
 from config.logging import logger
 from utils.translation_utils import translate_segments, get_supported_languages
@@ -20,33 +25,156 @@ async def cleanup_file(filepath: str):
         pass
 
 
+def resolve_language(language: Optional[str]) -> Optional[str]:
+    """Valida a dica de idioma e converte para o código usado pelo Whisper"""
+    if not language:
+        return None
+    
+    code = transcription_service.normalize_language(language)
+    if not code:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "invalid_language",
+                "message": f"Idioma não suportado pelo Whisper: {language}"
+            }
+        )
+    return code
+
+
+async def prepare_source(
+    file: Optional[UploadFile],
+    file_id: Optional[str],
+    filepath: Optional[str]
+) -> Tuple[str, Optional[str], bool]:
+    """Obtém o áudio a transcrever: upload ou arquivo já gerado por /download ou /cut
+    
+    Retorna (caminho, hash do conteúdo quando já calculado, se é upload temporário).
+    Arquivos referenciados são transcritos no lugar, sem cópia.
+    """
+    if sum(source is not None for source in (file, file_id, filepath)) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "invalid_source",
+                "message": "Informe exatamente um entre file, file_id e filepath"
+            }
+        )
+    
+    if file is None:
+        source_path = file_manager.resolve_file_id(file_id) if file_id else file_manager.resolve_filepath(filepath)
+        if not source_path:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "error": "file_not_found",
+                    "message": "Arquivo não encontrado ou expirado"
+                }
+            )
+        
+        # Adia a limpeza automática enquanto o arquivo é transcrito
+        file_manager.touch_file(source_path)
+        content_hash = None
+        is_upload = False
+    else:
+        # Valida tipo de arquivo
+        if not file.content_type or not any(
+            fmt in file.content_type.lower() 
+            for fmt in ['audio', 'video']
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "invalid_file_type",
+                    "message": "Tipo de arquivo não suportado. Use arquivos de áudio (.mp3, .wav, etc.)"
+                }
+            )
+        
+        # Copia o upload já recebido em blocos, calculando o hash do conteúdo na cópia (chave do cache de transcrições)
+        source_path, content_hash = await file_manager.save_upload_stream(file, file.filename)
+        is_upload = True
+    
+    try:
+        # Valida tamanho (o limite de 25MB da OpenAI vale para o áudio já comprimido, no envio)
+        file_size_mb = file_manager.get_file_size(source_path) / (1024 * 1024)
+        
+        if file_size_mb > settings.max_file_size_mb:
+            raise HTTPException(
+                status_code=413,
+                detail={
+                    "error": "file_too_large",
+                    "message": f"Arquivo muito grande: {file_size_mb:.1f}MB (máximo: {settings.max_file_size_mb}MB)"
+                }
+            )
+        
+        # Verifica se formato é suportado
+        if not transcription_service.is_supported_format(source_path):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "unsupported_format",
+                    "message": "Formato de áudio não suportado"
+                }
+            )
+    
+    except HTTPException:
+        if is_upload:
+            file_manager.delete_file(source_path)
+        raise
+    
+    return source_path, content_hash, is_upload
+
+
 @router.post("/", response_model=TranscriptionResponse)
 async def transcribe_audio(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(..., description="Arquivo de áudio (.mp3, .wav, .m4a, .flac)"),
+    file: Optional[UploadFile] = File(None, description="Arquivo de áudio (.mp3, .wav, .m4a, .flac)"),
+    file_id: Optional[str] = Query(None, description="ID de arquivo gerado por /download ou /cut (em vez do upload)"),
+    filepath: Optional[str] = Query(None, description="Campo `filepath` da resposta de /download ou /cut (em vez do upload)"),
     engine: TranscriptionEngine = Query(
         TranscriptionEngine.LOCAL, 
-        description="Engine de transcrição: 'local' (Whisper local) ou 'openai' (API OpenAI)"
+        description="Engine de transcrição: 'local' (Whisper local), 'local_fast' (faster-whisper int8) ou 'openai' (API OpenAI)"
     ),
     target_lang: Optional[str] = Query(None, description="Código do idioma de destino para tradução (ex: 'pt', 'en', 'ru')"),
     translation_engine: TranslationEngine = Query(
         TranslationEngine.AI_MODEL,
         description="Engine de tradução: 'ai_model' (modelos Helsinki-NLP) ou 'deep_translator' (Google Translate)"
-    )
+    ),
+    start: Optional[float] = Query(None, ge=0, description="Início da janela a transcrever em segundos (opcional)"),
+    end: Optional[float] = Query(None, gt=0, description="Fim da janela a transcrever em segundos (opcional)"),
+    timestamps: str = Query("relative", pattern="^(relative|absolute)$", description="Timestamps da janela: 'relative' (a partir de start) ou 'absolute' (no arquivo)"),
+    granularity: TranscriptionGranularity = Query(
+        TranscriptionGranularity.SEGMENT,
+        description="Granularidade: 'segment' (mais rápido) ou 'word' (inclui timestamps por palavra)"
+    ),
+    language: Optional[str] = Query(None, description="Idioma do áudio (ex: 'pt', 'en'); dispensa a detecção automática"),
+    video_id: Optional[str] = Query(None, description="video_id de origem, para reutilizar o idioma já detectado")
 ):
     """
     Transcreve arquivo de áudio com timestamps
     
     **Parâmetros:**
     - **file**: Arquivo de áudio para transcrição
+    - **file_id** / **filepath**: Alternativa ao upload — referência a um arquivo gerado por
+      `/download` ou `/cut`, transcrito direto no servidor (informe apenas uma das três opções)
     - **engine**: Engine de transcrição
       - `local`: Usa Whisper local (padrão, gratuito)
+      - `local_fast`: Usa faster-whisper (CTranslate2 int8), bem mais rápido na CPU
       - `openai`: Usa API da OpenAI (requer API key)
     - **target_lang**: Código do idioma de destino para tradução (opcional). Exemplos:
       - pt (português), en (inglês), es (espanhol), fr (francês), de (alemão), ru (russo), it (italiano), nl (holandês), pl (polonês), tr (turco), ar (árabe), zh (chinês), ja (japonês), ko (coreano)
     - **translation_engine**: Engine de tradução
       - `ai_model`: Usa modelos Helsinki-NLP (padrão, local, mais lento)
       - `deep_translator`: Usa Google Translate via deep-translator (online, mais rápido, mais idiomas)
+    - **start** / **end**: Janela a transcrever (opcional). Só esse trecho (mais uma pequena margem)
+      é decodificado e transcrito — o custo é proporcional ao clipe, não à música
+    - **timestamps**: Com janela, `relative` (padrão, 0 = start) ou `absolute` (tempo no arquivo)
+    - **granularity**: Granularidade dos timestamps
+      - `segment`: Apenas segmentos (padrão, dispensa o alinhamento por palavra)
+      - `word`: Inclui `words` em cada segmento, com início/fim de cada palavra (legendas karaokê)
+    - **language**: Idioma do áudio, quando conhecido (dispensa a detecção de idioma do Whisper).
+      Sem ele, o idioma já detectado para o mesmo arquivo ou `video_id` é reutilizado
+    - **video_id**: Vídeo de origem (deduzido automaticamente para arquivos de /download)
     
     **Formatos suportados:**
     - MP3, WAV, M4A, FLAC, OGG, WEBM
@@ -58,9 +186,11 @@ async def transcribe_audio(
     - Traduções opcionais por segmento
     
     **Limitações:**
-    - Arquivo máximo: 100MB (local) / 25MB (OpenAI)
+    - Arquivo máximo: 100MB; na OpenAI, até 25MB depois da compressão em opus mono (~2h de áudio a 24 kbps)
     - OpenAI requer configuração de API key
     - deep_translator requer conexão com internet
+    - Com a fila de transcrição local cheia, retorna 503 com `Retry-After`
+      (arquivos já transcritos são respondidos do cache mesmo assim)
     
     **Exemplo de resposta:**
     ```json
@@ -72,7 +202,10 @@ async def transcribe_audio(
                 "start": 0.0,
                 "end": 3.5,
                 "text": "Esta é uma música incrível",
-                "translation": "This is an amazing song"
+                "translation": "This is an amazing song",
+                "words": [
+                    {"start": 0.0, "end": 0.4, "word": "Esta", "probability": 0.98}
+                ]
             }
         ],
         "full_text": "Esta é uma música incrível..."
@@ -80,62 +213,53 @@ async def transcribe_audio(
     ```
     """
     temp_filepath = None
+    is_upload = False
     
     try:
         logger.info(f"Transcrição solicitada com engine: {engine.value}, tradução: {translation_engine.value}")
         
-        # Valida tipo de arquivo
-        if not file.content_type or not any(
-            fmt in file.content_type.lower() 
-            for fmt in ['audio', 'video']
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "invalid_file_type",
-                    "message": "Tipo de arquivo não suportado. Use arquivos de áudio (.mp3, .wav, etc.)"
-                }
-            )
-        
-        # Lê conteúdo do arquivo
-        file_content = await file.read()
-        
-        # Valida tamanho
-        file_size_mb = len(file_content) / (1024 * 1024)
-        max_size = 25 if engine == TranscriptionEngine.OPENAI else settings.max_file_size_mb
+        language = resolve_language(language)
+        temp_filepath, content_hash, is_upload = await prepare_source(file, file_id, filepath)
+        video_id = video_id or file_manager.get_video_id(temp_filepath)
         
-        if file_size_mb > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail={
-                    "error": "file_too_large",
-                    "message": f"Arquivo muito grande: {file_size_mb:.1f}MB (máximo: {max_size}MB para {engine.value})"
-                }
-            )
-        
-        # Salva arquivo temporário
-        temp_filepath = await file_manager.save_uploaded_file(file_content, file.filename)
-        
-        # Verifica se formato é suportado
-        if not transcription_service.is_supported_format(temp_filepath):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "unsupported_format",
-                    "message": "Formato de áudio não suportado"
-                }
-            )
+        # Janela opcional: completa o lado ausente e valida contra a duração
+        if start is not None or end is not None:
+            start = start or 0.0
+            if end is None:
+                info = await audio_converter.get_audio_info(temp_filepath)
+                end = info.get('duration') if info else None
+            
+            is_valid, message = await audio_converter.validate_time_range(temp_filepath, start, end or 0.0)
+            if not is_valid:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "invalid_time_range",
+                        "message": message
+                    }
+                )
         
         # Executa transcrição
-        result = await transcription_service.transcribe_audio(temp_filepath, engine)
+        result = await transcription_service.transcribe_audio(
+            temp_filepath,
+            engine,
+            content_hash=content_hash,
+            start=start,
+            end=end,
+            relative_timestamps=timestamps == "relative",
+            granularity=granularity,
+            language=language,
+            video_id=video_id
+        )
 
         # Tradução opcional dos segmentos
         segments = [s.dict() if hasattr(s, 'dict') else dict(s) for s in result['segments']]
         if target_lang:
-            segments = translate_segments(segments, target_lang, translation_engine.value)
+            segments = translate_segments(segments, target_lang, translation_engine.value, source_lang=result.get('language'))
 
-        # Agenda limpeza do arquivo
-        background_tasks.add_task(cleanup_file, temp_filepath)
+        # Agenda limpeza do upload (arquivos referenciados seguem a limpeza normal)
+        if is_upload:
+            background_tasks.add_task(cleanup_file, temp_filepath)
 
         response = TranscriptionResponse(
             success=True,
@@ -149,13 +273,28 @@ async def transcribe_audio(
         
     except HTTPException:
         # Limpa arquivo em caso de erro HTTP
-        if temp_filepath:
+        if is_upload:
             file_manager.delete_file(temp_filepath)
         raise
+    
+    except AdmissionRejected as e:
+        if is_upload:
+            file_manager.delete_file(temp_filepath)
+        
+        logger.warning(f"Transcrição rejeitada por sobrecarga (retry em {e.retry_after}s)")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "transcription_overloaded",
+                "message": "Fila de transcrição cheia, tente novamente mais tarde",
+                "retry_after": e.retry_after
+            },
+            headers={"Retry-After": str(e.retry_after)}
+        )
         
     except Exception as e:
         # Limpa arquivo em caso de erro interno
-        if temp_filepath:
+        if is_upload:
             file_manager.delete_file(temp_filepath)
             
         logger.error(f"Erro na transcrição: {e}")
@@ -169,6 +308,178 @@ async def transcribe_audio(
         )
 
 
+def format_stream_event(event: str, data: dict, stream_format: str) -> str:
+    """Serializa um evento do stream como SSE ou como linha NDJSON"""
+    if stream_format == "ndjson":
+        return json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def transcribe_audio_stream(
+    background_tasks: BackgroundTasks,
+    file: Optional[UploadFile] = File(None, description="Arquivo de áudio (.mp3, .wav, .m4a, .flac)"),
+    file_id: Optional[str] = Query(None, description="ID de arquivo gerado por /download ou /cut (em vez do upload)"),
+    filepath: Optional[str] = Query(None, description="Campo `filepath` da resposta de /download ou /cut (em vez do upload)"),
+    engine: TranscriptionEngine = Query(
+        TranscriptionEngine.LOCAL, 
+        description="Engine de transcrição: 'local', 'local_fast' ou 'openai'"
+    ),
+    target_lang: Optional[str] = Query(None, description="Código do idioma de destino para tradução (ex: 'pt', 'en', 'ru')"),
+    translation_engine: TranslationEngine = Query(
+        TranslationEngine.AI_MODEL,
+        description="Engine de tradução: 'ai_model' (modelos Helsinki-NLP) ou 'deep_translator' (Google Translate)"
+    ),
+    stream_format: str = Query("sse", pattern="^(sse|ndjson)$", description="Formato do stream: 'sse' ou 'ndjson'"),
+    granularity: TranscriptionGranularity = Query(
+        TranscriptionGranularity.SEGMENT,
+        description="Granularidade: 'segment' (mais rápido) ou 'word' (inclui timestamps por palavra)"
+    ),
+    language: Optional[str] = Query(None, description="Idioma do áudio (ex: 'pt', 'en'); dispensa a detecção automática"),
+    video_id: Optional[str] = Query(None, description="video_id de origem, para reutilizar o idioma já detectado")
+):
+    """
+    Transcreve arquivo de áudio enviando os segmentos conforme ficam prontos
+    
+    Mesmos parâmetros de `POST /transcribe` (upload, `file_id` ou `filepath`), com a resposta em streaming
+    (Server-Sent Events ou NDJSON, conforme `stream_format`).
+    
+    **Eventos:**
+    - `segment`: `index`, `start`, `end`, `text` (e `words` com `granularity=word`) — emitido assim que fica pronto
+      (`local_fast` emite segmento a segmento; `local` emite os segmentos de cada bloco de áudio de uma vez,
+      ao fim do bloco: ~10s no primeiro (`TRANSCRIPTION_STREAM_FIRST_CHUNK_SECONDS`), ~45s nos demais
+      (`TRANSCRIPTION_CHUNK_SECONDS`); `openai` tudo ao final)
+    - `translation`: `index`, `translation` — com `target_lang`, traduzido enquanto a transcrição continua
+    - `done`: `language`, `full_text`, `segments` (com traduções) — resultado final, igual ao de `POST /transcribe`
+    - `error`: `error`, `message` — falha durante o stream
+    
+    Com a fila de transcrição local cheia, retorna 503 com `Retry-After` antes de iniciar o stream.
+    """
+    temp_filepath = None
+    is_upload = False
+    
+    try:
+        logger.info(f"Transcrição em streaming solicitada com engine: {engine.value}, tradução: {translation_engine.value}")
+        
+        language = resolve_language(language)
+        temp_filepath, content_hash, is_upload = await prepare_source(file, file_id, filepath)
+        video_id = video_id or file_manager.get_video_id(temp_filepath)
+        
+        if content_hash is None:
+            loop = asyncio.get_event_loop()
+            content_hash = await loop.run_in_executor(None, transcription_service.hash_file, temp_filepath)
+        
+        # Depois que o stream começa não é mais possível responder 503
+        cache_key = transcription_service.get_stream_cache_key(content_hash, engine, granularity, language)
+        if engine != TranscriptionEngine.OPENAI and cache_key not in transcription_service.result_cache:
+            transcription_service.admission.check()
+    
+    except AdmissionRejected as e:
+        if is_upload:
+            file_manager.delete_file(temp_filepath)
+        
+        logger.warning(f"Transcrição rejeitada por sobrecarga (retry em {e.retry_after}s)")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "transcription_overloaded",
+                "message": "Fila de transcrição cheia, tente novamente mais tarde",
+                "retry_after": e.retry_after
+            },
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    # Idioma de origem das traduções, quando conhecido antes da transcrição
+    source_lang = language or transcription_service.get_known_language(content_hash, video_id)
+    
+    async def event_stream():
+        events: asyncio.Queue = asyncio.Queue()
+        pending_translations: asyncio.Queue = asyncio.Queue()
+        segments = []
+        final = {}
+        
+        async def transcribe():
+            async for event, data in transcription_service.stream_transcription(
+                temp_filepath,
+                engine,
+                content_hash=content_hash,
+                granularity=granularity,
+                language=language,
+                video_id=video_id
+            ):
+                if event == 'segment':
+                    segments.append({key: value for key, value in data.items() if key != 'index'})
+                    await events.put(('segment', data))
+                    if target_lang:
+                        await pending_translations.put(data)
+                else:
+                    final.update(data)
+            await pending_translations.put(None)
+        
+        async def translate():
+            # Traduz em paralelo à transcrição, um segmento por vez
+            loop = asyncio.get_event_loop()
+            while (segment := await pending_translations.get()) is not None:
+                translated = await loop.run_in_executor(
+                    None,
+                    translate_segments,
+                    [{'text': segment['text']}],
+                    target_lang,
+                    translation_engine.value,
+                    source_lang
+                )
+                segments[segment['index']]['translation'] = translated[0]['translation']
+                await events.put(('translation', {'index': segment['index'], 'translation': translated[0]['translation']}))
+        
+        tasks = [asyncio.create_task(transcribe())]
+        if target_lang:
+            tasks.append(asyncio.create_task(translate()))
+        
+        async def close_events():
+            try:
+                await asyncio.gather(*tasks)
+                await events.put(None)
+            except Exception as e:
+                await events.put(e)
+        
+        closer = asyncio.create_task(close_events())
+        
+        try:
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Erro na transcrição em streaming: {item}")
+                    yield format_stream_event("error", {
+                        "error": "transcription_failed",
+                        "message": str(item)
+                    }, stream_format)
+                    return
+                yield format_stream_event(*item, stream_format)
+            
+            logger.info(f"Transcrição em streaming concluída: {len(segments)} segmentos")
+            yield format_stream_event("done", {**final, "segments": segments}, stream_format)
+        
+        finally:
+            # Cliente desconectado ou erro: interrompe transcrição e tradução
+            for task in [*tasks, closer]:
+                task.cancel()
+    
+    # Agenda limpeza do upload (executada após o fim do stream)
+    if is_upload:
+        background_tasks.add_task(cleanup_file, temp_filepath)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson" if stream_format == "ndjson" else "text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/translation-engines")
 async def get_translation_engines():
     """
@@ -251,12 +562,19 @@ async def get_available_engines():
                     "description": "Transcrição local usando OpenAI Whisper (gratuito)",
                     "max_file_size": f"{settings.max_file_size_mb}MB"
                 })
+            elif engine == "local_fast":
+                engine_info.append({
+                    "value": "local_fast",
+                    "name": "faster-whisper Local",
+                    "description": f"Transcrição local com faster-whisper (CTranslate2, {settings.fast_whisper_compute_type} na CPU; gratuito)",
+                    "max_file_size": f"{settings.max_file_size_mb}MB"
+                })
             elif engine == "openai":
                 engine_info.append({
                     "value": "openai",
                     "name": "OpenAI API",
                     "description": "Transcrição via API da OpenAI (requer API key)",
-                    "max_file_size": "25MB"
+                    "max_file_size": f"{settings.max_file_size_mb}MB (até 25MB após compressão em opus)"
                 })
         
         return {
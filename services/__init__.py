@@ -2,3 +2,5 @@ from .youtube_music_service import youtube_music_service
 from .download_service import download_service
 from .transcription_service import transcription_service
 from .audio_edit_service import audio_edit_service
+from .prefetch_service import prefetch_service
+from .batch_download_service import batch_download_service
@@ -0,0 +1,127 @@
+import asyncio
+import uuid
+from typing import List, Optional, Dict, Any, Set
+from models.schemas import AudioFormat, AudioQuality
+from services.download_service import download_service, DownloadPriority, DownloadAborted
+from utils.cache import TTLCache
+from utils.file_manager import file_manager
+from config.settings import settings
+from config.logging import logger
+
+
+class BatchDownloadService:
+    """Serviço para download em lote (lista de vídeos ou playlist)"""
+
+    def __init__(self):
+        self.jobs = TTLCache(ttl_seconds=settings.batch_job_ttl_seconds, max_entries=500)
+        self.semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def resolve_video_ids(self, video_ids: Optional[List[str]], playlist_id: Optional[str]) -> List[str]:
+        """Monta lista de vídeos (sem duplicados) a partir dos IDs ou da playlist"""
+        ids = list(video_ids or [])
+        if playlist_id:
+            ids.extend(await download_service.get_playlist_video_ids(playlist_id, settings.batch_max_items))
+
+        # Remove duplicados mantendo a ordem
+        return list(dict.fromkeys(vid for vid in ids if vid))
+
+    def create_job(
+        self,
+        video_ids: List[str],
+        format: AudioFormat,
+        accept_formats: Optional[List[AudioFormat]] = None,
+        quality: AudioQuality = AudioQuality.MASTER
+    ) -> Dict[str, Any]:
+        """Cria um lote de downloads"""
+        job = {
+            'batch_id': uuid.uuid4().hex,
+            'status': 'running',
+            'format': format,
+            'accept_formats': accept_formats,
+            'quality': quality,
+            'items': [{'video_id': vid, 'status': 'pending'} for vid in video_ids]
+        }
+        self.jobs.set(job['batch_id'], job)
+        return job
+
+    def get_job(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Obtém lote pelo ID"""
+        return self.jobs.get(batch_id)
+
+    def start_job(self, job: Dict[str, Any]) -> None:
+        """Executa o lote em background"""
+        task = asyncio.create_task(self.run_job(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa todos os itens do lote com concorrência limitada"""
+        logger.info(f"Lote {job['batch_id']} iniciado: {len(job['items'])} vídeos")
+
+        await asyncio.gather(*(
+            self._process_item(item, job['format'], job['accept_formats'], job['quality'])
+            for item in job['items']
+        ))
+
+        job['status'] = 'completed'
+        logger.info(
+            f"Lote {job['batch_id']} concluído: "
+            f"{self.count_items(job, 'completed')} ok, {self.count_items(job, 'failed')} falhas"
+        )
+        return job
+
+    async def _process_item(
+        self,
+        item: Dict[str, Any],
+        format: AudioFormat,
+        accept_formats: Optional[List[AudioFormat]],
+        quality: AudioQuality
+    ) -> None:
+        """Baixa um item do lote (metadados, negociação de formato e download)"""
+        video_id = item['video_id']
+
+        async with self.semaphore:
+            item['status'] = 'downloading'
+            try:
+                metadata = await download_service.get_video_metadata(video_id)
+                target_format = download_service.negotiate_format(metadata, format, accept_formats)
+
+                is_valid, error_code, error_msg = download_service.validate_metadata(metadata, target_format)
+                if not is_valid:
+                    item.update(status='failed', error=error_code, message=error_msg)
+                    return
+
+                result = await download_service.download_audio(
+                    video_id,
+                    target_format,
+                    quality=quality,
+                    priority=DownloadPriority.BATCH
+                )
+                if not result:
+                    raise Exception("Falha no download do áudio")
+
+                item.update(
+                    status='completed',
+                    filepath=result['filepath'],
+                    file_id=file_manager.get_file_id(result['filepath']),
+                    title=result['title'],
+                    artist=result['artist'],
+                    duration=result['duration'],
+                    format=result['format'],
+                    file_size=result['file_size']
+                )
+
+            except DownloadAborted as e:
+                item.update(status='failed', error=e.error_code, message=e.message)
+            except Exception as e:
+                logger.warning(f"Falha no item {video_id} do lote: {e}")
+                item.update(status='failed', error='download_failed', message=str(e))
+
+    @staticmethod
+    def count_items(job: Dict[str, Any], status: str) -> int:
+        return sum(1 for item in job['items'] if item['status'] == status)
+
+
+# Global service instance
+batch_download_service = BatchDownloadService()
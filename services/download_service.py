@@ -1,21 +1,120 @@
 import yt_dlp
 import asyncio
+import threading
+import time
+from enum import IntEnum
 from pathlib import Path
-from typing import Optional, Dict, Any
-from models.schemas import AudioFormat
+from typing import Optional, Dict, Any, List, Tuple, Set
+from models.schemas import AudioFormat, AudioQuality
 from utils.file_manager import file_manager
 from utils.audio_converter import audio_converter
+from utils.cache import TTLCache, DiskCache
+from utils.progress_tracker import progress_tracker
+from utils.ytdlp_pool import YoutubeDLPool
+from utils.partial_downloads import partial_download_index
+from utils.bandwidth_scheduler import BandwidthScheduler, Transfer
+from config.settings import settings
 from config.logging import logger
 
 
+# Bytes por segundo estimados do arquivo final após conversão
+OUTPUT_BYTES_PER_SECOND = {
+    AudioFormat.MP3: 128000 // 8,   # libmp3lame padrão (128 kbps)
+    AudioFormat.WAV: 44100 * 2 * 2  # PCM 16-bit estéreo 44.1 kHz
+}
+
+# Filtro de codec no yt-dlp por formato (prefere streams que dispensam transcodificação)
+CODEC_FILTERS = {
+    AudioFormat.OPUS: '[acodec=opus]',
+    AudioFormat.M4A: '[ext=m4a]',
+}
+
+# Seleção de stream no yt-dlp por qualidade (baixa apenas o necessário para o uso)
+QUALITY_SELECTORS = {
+    AudioQuality.TRANSCRIBE: ['bestaudio[acodec=opus][abr<=64]', 'worstaudio[acodec=opus]', 'worstaudio', 'worst'],
+    AudioQuality.PREVIEW: ['bestaudio[abr<=160][abr>=96]', 'bestaudio[abr<=160]', 'bestaudio', 'best'],
+    AudioQuality.MASTER: ['bestaudio', 'best'],
+}
+
+# Bitrate da transcodificação por qualidade (None = padrão do codec)
+QUALITY_BITRATES = {
+    AudioQuality.TRANSCRIBE: '64k',
+    AudioQuality.PREVIEW: '128k',
+    AudioQuality.MASTER: None,
+}
+
+# Ordem das qualidades: um arquivo de qualidade superior atende pedidos inferiores
+QUALITY_ORDER = [AudioQuality.TRANSCRIBE, AudioQuality.PREVIEW, AudioQuality.MASTER]
+
+# Codec de origem que pode ser entregue sem transcodificação em cada formato
+PASSTHROUGH_CODECS = {
+    AudioFormat.OPUS: 'opus',
+    AudioFormat.M4A: 'mp4a',
+}
+
+
+def build_format_selector(format: AudioFormat, quality: AudioQuality = AudioQuality.MASTER) -> str:
+    """Monta seletor de formato do yt-dlp para o formato e a qualidade pedidos"""
+    selectors = QUALITY_SELECTORS[quality]
+    codec_filter = CODEC_FILTERS.get(format)
+    if codec_filter:
+        preferred = [
+            s if codec_filter in s else s + codec_filter
+            for s in selectors
+            if 'audio' in s and (codec_filter in s or '[acodec=' not in s)
+        ]
+        selectors = preferred + selectors
+    return '/'.join(dict.fromkeys(selectors))
+
+
+class DownloadPriority(IntEnum):
+    """Prioridade do download (menor valor = mais prioritário)"""
+    INTERACTIVE = 0
+    BATCH = 1
+    PREFETCH = 2
+
+
+# Peso de cada prioridade na divisão da banda global
+PRIORITY_WEIGHTS = {
+    DownloadPriority.INTERACTIVE: 4.0,
+    DownloadPriority.BATCH: 2.0,
+    DownloadPriority.PREFETCH: 1.0,
+}
+
+
+class DownloadAborted(yt_dlp.utils.DownloadCancelled):
+    """Download interrompido durante a transferência"""
+    
+    def __init__(self, error_code: str, message: str):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+
+
+class DownloadLimitExceeded(DownloadAborted):
+    """Download abortado durante a transferência por exceder limite de tamanho ou tempo"""
+
+
+class DownloadPreempted(DownloadAborted):
+    """Download de baixa prioridade cancelado para liberar recursos"""
+
+
+# Valores de 'availability' do yt-dlp que impedem o download
+BLOCKED_AVAILABILITY = {
+    'private': ('video_private', "Vídeo privado"),
+    'needs_auth': ('video_requires_auth', "Vídeo requer autenticação - não disponível para download automático"),
+    'premium_only': ('video_requires_auth', "Vídeo disponível apenas para assinantes Premium"),
+    'subscriber_only': ('video_requires_auth', "Vídeo disponível apenas para membros do canal"),
+    'unavailable': ('video_unavailable', "Vídeo indisponível"),
+}
+
+
 class DownloadService:
     """Serviço para download de áudio do YouTube"""
     
     def __init__(self):
         self.download_options = {
             'format': 'bestaudio/best',
-            'extractaudio': True,
-            'audioformat': 'mp3',
             'outtmpl': f'{file_manager.temp_dir}/%(title)s.%(ext)s',
             'restrictfilenames': True,
             'noplaylist': True,
@@ -27,39 +126,386 @@ class DownloadService:
             # Opções adicionais para contornar problemas de rede
             'retries': 3,
             'fragment_retries': 3,
-            'skip_unavailable_fragments': True,            # Headers para contornar detecção de bot
+            'skip_unavailable_fragments': True,
+            'socket_timeout': 10,  # Timeout baixo para evitar travamentos
+            # Cache em disco compartilhado (funções de assinatura e player JS do YouTube)
+            'cachedir': settings.ytdlp_cache_dir,
+            # Headers para contornar detecção de bot
             'http_headers': {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
         }
+        
+        # Instâncias YoutubeDL reutilizadas entre downloads
+        self.ytdlp_pool = YoutubeDLPool(self.download_options, size=settings.ytdlp_pool_size)
+        
+        # Divisão da banda entre downloads simultâneos
+        self.bandwidth_scheduler = BandwidthScheduler(
+            global_limit=settings.bandwidth_global_limit_kbps * 1024,
+            max_active=settings.bandwidth_max_active_downloads,
+            small_transfer_bytes=settings.bandwidth_small_download_mb * 1024 * 1024
+        )
+        
+        # Cache de metadados por video_id (inclui rejeições conhecidas)
+        self.metadata_cache = TTLCache(
+            ttl_seconds=settings.metadata_cache_ttl_seconds,
+            max_entries=settings.metadata_cache_max_entries
+        )
+        
+        # Cache de downloads concluídos por (video_id, formato)
+        self.download_cache = TTLCache(
+            ttl_seconds=settings.download_cache_ttl_seconds,
+            max_entries=settings.metadata_cache_max_entries
+        )
+        
+        # Índice persistente dos downloads (sobrevive a reinícios e é preenchido pelo warm_cache.py)
+        self.download_index = DiskCache(settings.download_index_dir)
+        
+        # Downloads interativos/lote em andamento (usado para pausar o prefetch)
+        self.foreground_downloads = 0
+        
+        # Downloads em andamento por (video_id, formato), compartilhados entre requisições
+        self._inflight: Dict[str, asyncio.Task] = {}
+    
+    async def get_video_metadata(self, video_id: str) -> Dict[str, Any]:
+        """Obtém metadados do vídeo sem baixar o áudio (cache por video_id)"""
+        cached = self.metadata_cache.get(video_id)
+        if cached is not None:
+            logger.info(f"Metadados em cache: {video_id}")
+            return cached
+        
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        logger.info(f"Extraindo metadados: {video_id}")
+        
+        loop = asyncio.get_event_loop()
+        metadata = await loop.run_in_executor(None, self._extract_metadata, video_id, url)
+        
+        self.metadata_cache.set(video_id, metadata)
+        return metadata
+    
+    def _extract_metadata(self, video_id: str, url: str) -> Dict[str, Any]:
+        """Executa extração de metadados com yt-dlp (download=False)"""
+        try:
+            with self.ytdlp_pool.acquire() as ydl:
+                info = ydl.extract_info(url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            availability = self._classify_download_error(str(e))
+            if not availability:
+                raise Exception(f"Falha ao obter metadados: {str(e)}")
+            
+            # Rejeição conhecida: também fica em cache
+            return {'video_id': video_id, 'availability': availability}
+        
+        if not info:
+            raise Exception("Falha ao obter metadados - informações vazias")
+        
+        return self._summarize_metadata(video_id, info)
+    
+    @staticmethod
+    def _classify_download_error(error_msg: str) -> Optional[str]:
+        """Converte mensagem de erro do yt-dlp em valor de 'availability'"""
+        error_msg = error_msg.lower()
+        
+        if 'age' in error_msg and ('confirm' in error_msg or 'restrict' in error_msg):
+            return 'age_restricted'
+        if 'private' in error_msg:
+            return 'private'
+        if 'sign in' in error_msg or 'login' in error_msg:
+            return 'needs_auth'
+        if 'unavailable' in error_msg:
+            return 'unavailable'
+        return None
+    
+    @staticmethod
+    def _summarize_metadata(video_id: str, info: dict) -> Dict[str, Any]:
+        """Reduz info do yt-dlp aos campos usados na validação"""
+        audio_formats = [
+            f for f in info.get('formats') or []
+            if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+        ]
+        best_audio = max(
+            audio_formats,
+            key=lambda f: f.get('abr') or f.get('tbr') or 0,
+            default=None
+        )
+        
+        source = best_audio or info
+        filesize = source.get('filesize') or source.get('filesize_approx')
+        bitrate = source.get('abr') or source.get('tbr')
+        audio_codecs = sorted({f['acodec'].split('.')[0] for f in audio_formats})
+        
+        return {
+            'video_id': video_id,
+            'title': info.get('title', 'Unknown'),
+            'artist': info.get('uploader', 'Unknown Artist'),
+            'duration': info.get('duration'),
+            'availability': info.get('availability') or 'public',
+            'age_limit': info.get('age_limit') or 0,
+            'is_live': bool(info.get('is_live')),
+            'filesize': filesize,
+            'bitrate_kbps': bitrate,
+            'audio_codecs': audio_codecs
+        }
+    
+    @staticmethod
+    def negotiate_format(
+        metadata: Optional[Dict[str, Any]],
+        requested: AudioFormat,
+        accepted: Optional[List[AudioFormat]] = None
+    ) -> AudioFormat:
+        """Escolhe, entre os formatos aceitos, um que o YouTube entregue sem transcodificação"""
+        if requested == AudioFormat.NATIVE or not accepted:
+            return requested
+        
+        if AudioFormat.NATIVE in accepted:
+            return AudioFormat.NATIVE
+        
+        available_codecs = set((metadata or {}).get('audio_codecs') or [])
+        for candidate in [requested, *accepted]:
+            codec = PASSTHROUGH_CODECS.get(candidate)
+            if codec and codec in available_codecs:
+                return candidate
+        
+        return requested
     
-    async def download_audio(self, video_id: str, format: AudioFormat = AudioFormat.MP3) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def estimate_download_size(metadata: Dict[str, Any], format: AudioFormat = AudioFormat.MP3) -> Optional[int]:
+        """Estima tamanho em bytes (maior entre arquivo baixado e arquivo final)"""
+        duration = metadata.get('duration')
+        estimates = []
+        
+        if metadata.get('filesize'):
+            estimates.append(int(metadata['filesize']))
+        elif duration and metadata.get('bitrate_kbps'):
+            estimates.append(int(duration * metadata['bitrate_kbps'] * 1000 / 8))
+        
+        if duration and format in OUTPUT_BYTES_PER_SECOND:
+            estimates.append(int(duration * OUTPUT_BYTES_PER_SECOND[format]))
+        
+        return max(estimates) if estimates else None
+    
+    def validate_metadata(self, metadata: Dict[str, Any], format: AudioFormat = AudioFormat.MP3) -> Tuple[bool, str, str]:
+        """Valida metadados antes do download: (válido, código de erro, mensagem)"""
+        availability = metadata.get('availability')
+        
+        if availability == 'age_restricted' or (metadata.get('age_limit') or 0) >= 18:
+            return False, "age_restricted", "Vídeo com restrição de idade"
+        
+        if availability in BLOCKED_AVAILABILITY:
+            error_code, message = BLOCKED_AVAILABILITY[availability]
+            return False, error_code, message
+        
+        if metadata.get('is_live'):
+            return False, "live_stream", "Transmissões ao vivo não são suportadas"
+        
+        duration = metadata.get('duration')
+        if duration and duration > settings.max_duration_seconds:
+            return False, "duration_too_long", (
+                f"Duração de {duration:.0f}s excede o limite de {settings.max_duration_seconds}s"
+            )
+        
+        estimated_size = self.estimate_download_size(metadata, format)
+        max_size_bytes = settings.max_file_size_mb * 1024 * 1024
+        if estimated_size and estimated_size > max_size_bytes:
+            return False, "file_too_large", (
+                f"Tamanho estimado de {estimated_size / (1024 * 1024):.1f}MB excede o limite de {settings.max_file_size_mb}MB"
+            )
+        
+        return True, "", "Válido"
+    
+    def get_cached_download(
+        self,
+        video_id: str,
+        format: AudioFormat = AudioFormat.MP3,
+        quality: AudioQuality = AudioQuality.MASTER
+    ) -> Optional[Dict[str, Any]]:
+        """Retorna download em cache (na qualidade pedida ou superior) se o arquivo ainda existir"""
+        for candidate in QUALITY_ORDER[QUALITY_ORDER.index(quality):]:
+            cache_key = f"{video_id}:{format.value}:{candidate.value}"
+            cached = self.download_cache.get(cache_key)
+            if not cached:
+                cached = self.download_index.get(cache_key)
+                if not cached:
+                    continue
+                cached.update(format=AudioFormat(cached['format']), quality=AudioQuality(cached['quality']))
+                self.download_cache.set(cache_key, cached)
+            
+            if not file_manager.file_exists(cached['filepath']):
+                self.download_cache.delete(cache_key)
+                self.download_index.delete(cache_key)
+                continue
+            
+            return dict(cached)
+        
+        return None
+    
+    def store_download(self, cache_key: str, result: Dict[str, Any], pinned_until: Optional[float] = None) -> None:
+        """Registra download concluído no cache em memória e no índice persistente
+        
+        Arquivos com `pinned_until` no futuro são preservados pela limpeza automática.
+        """
+        self.download_cache.set(cache_key, dict(result))
+        self.download_index.set(cache_key, {
+            **result,
+            'format': result['format'].value,
+            'quality': result['quality'].value,
+            'pinned_until': pinned_until
+        })
+    
+    def get_pinned_files(self) -> Set[str]:
+        """Arquivos de downloads fixados (ex.: pré-aquecidos pelo warm_cache.py)"""
+        now = time.time()
+        return {
+            str(Path(entry['filepath']).resolve())
+            for entry in self.download_index.values()
+            if entry and (entry.get('pinned_until') or 0) > now
+        }
+    
+    async def download_audio(
+        self,
+        video_id: str,
+        format: AudioFormat = AudioFormat.MP3,
+        quality: AudioQuality = AudioQuality.MASTER,
+        download_id: Optional[str] = None,
+        priority: DownloadPriority = DownloadPriority.INTERACTIVE,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Baixa áudio de um vídeo do YouTube (reutiliza downloads em cache)"""
+        cached = self.get_cached_download(video_id, format, quality)
+        if cached:
+            logger.info(f"Download em cache: {cached['filepath']}")
+            file_manager.touch_file(cached['filepath'])
+            return cached
+        
+        cache_key = f"{video_id}:{format.value}:{quality.value}"
+        
+        # Prefetch não é compartilhado: pode ser cancelado a qualquer momento
+        if priority == DownloadPriority.PREFETCH:
+            result = await self._download_audio(video_id, format, quality, download_id, priority, cancel_event)
+            if result:
+                self.store_download(cache_key, result)
+            return result
+        
+        # Reaproveita download idêntico já em andamento
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            logger.info(f"Aguardando download em andamento: {cache_key}")
+            result = await asyncio.shield(inflight)
+            return dict(result) if result else result
+        
+        task = asyncio.ensure_future(
+            self._download_audio(video_id, format, quality, download_id, priority, cancel_event)
+        )
+        self._inflight[cache_key] = task
+        self.foreground_downloads += 1
+        
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self.foreground_downloads -= 1
+            if self._inflight.get(cache_key) is task:
+                del self._inflight[cache_key]
+        
+        if result:
+            self.store_download(cache_key, result)
+        return result
+    
+    async def get_playlist_video_ids(self, playlist_id: str, limit: int) -> List[str]:
+        """Lista video_ids de uma playlist sem baixar (extração plana)"""
+        url = f"https://www.youtube.com/playlist?list={playlist_id}"
+        overrides = {
+            'extract_flat': 'in_playlist',
+            'playlistend': limit
+        }
+        
+        def extract():
+            with self.ytdlp_pool.acquire(overrides) as ydl:
+                return ydl.extract_info(url, download=False)
+        
+        loop = asyncio.get_event_loop()
+        try:
+            info = await loop.run_in_executor(None, extract)
+        except yt_dlp.utils.DownloadError as e:
+            raise Exception(f"Falha ao obter playlist: {str(e)}")
+        
+        entries = (info or {}).get('entries') or []
+        return [entry['id'] for entry in entries if entry and entry.get('id')][:limit]
+    
+    async def _download_audio(
+        self,
+        video_id: str,
+        format: AudioFormat,
+        quality: AudioQuality,
+        download_id: Optional[str],
+        priority: DownloadPriority,
+        cancel_event: Optional[threading.Event]
+    ) -> Optional[Dict[str, Any]]:
         """Baixa áudio de um vídeo do YouTube"""
+        partial_key = f"{video_id}:{format.value}:{quality.value}"
+        base_filename = None
+        
         try:
             url = f"https://www.youtube.com/watch?v={video_id}"
-            logger.info(f"Iniciando download de áudio: {video_id}")
-            
-            # Configurações específicas do formato
-            options = self.download_options.copy()
-            if format == AudioFormat.WAV:
-                options['audioformat'] = 'wav'
-                options['audioquality'] = '0'  # Melhor qualidade para WAV
+            logger.info(f"Iniciando download de áudio: {video_id} (qualidade: {quality.value})")
             
-            # Adiciona timeout mais baixo para evitar travamentos
-            options['socket_timeout'] = 10
+            # Configurações específicas do formato e da qualidade (aplicadas à instância do pool)
+            options = {'format': build_format_selector(format, quality)}
             
-            # Gera nome único para o arquivo
-            temp_filename = file_manager.get_temp_filepath(
+            # Gera nome único para o arquivo, ou reutiliza o de um download parcial para retomá-lo
+            new_filename = file_manager.get_temp_filepath(
                 prefix=f"download_{video_id}", 
                 suffix=f".{format.value}"
             )
-            options['outtmpl'] = temp_filename.replace(f".{format.value}", ".%(ext)s")
+            base_filename, resumed = partial_download_index.acquire(
+                partial_key, str(Path(new_filename).with_suffix(''))
+            )
+            temp_filename = f"{base_filename}.{format.value}"
+            options['outtmpl'] = f"{base_filename}.%(ext)s"
+            if resumed:
+                logger.info(f"Retomando download parcial: {base_filename}")
+            
+            # Aguarda vaga no agendador de banda (downloads em background usam banda limitada)
+            transfer = await self.bandwidth_scheduler.acquire(
+                name=partial_key,
+                priority=priority,
+                weight=PRIORITY_WEIGHTS[priority],
+                expected_bytes=(self.metadata_cache.get(video_id) or {}).get('filesize'),
+                max_rate=self._get_max_rate(priority)
+            )
+            
+            # Aborta a transferência ao exceder tamanho ou tempo máximo
+            options['progress_hooks'] = [
+                self._make_limit_hook(
+                    max_bytes=settings.max_file_size_mb * 1024 * 1024,
+                    max_seconds=settings.max_download_seconds
+                ),
+                progress_tracker.make_ytdlp_hook(download_id),
+                self.bandwidth_scheduler.make_ytdlp_hook(transfer)
+            ]
+            if cancel_event is not None:
+                options['progress_hooks'].append(self._make_cancel_hook(cancel_event))
             
             logger.info(f"Configurações do download: {options['outtmpl']}")
             
             # Executa download em thread separada
             loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, self._download_with_ytdlp, url, options)
+            try:
+                info = await loop.run_in_executor(None, self._download_with_ytdlp, url, options, transfer)
+            except DownloadAborted as e:
+                if e.error_code == "file_too_large":
+                    # Parcial inútil: nunca caberá no limite
+                    partial_download_index.release(partial_key, base_filename)
+                    removed = file_manager.delete_matching(Path(base_filename).name + ".*")
+                    logger.warning(f"Download abortado ({e.error_code}): {video_id} - {removed} arquivos parciais removidos")
+                else:
+                    # Tempo esgotado ou cancelamento: mantém parcial para retomada
+                    partial_download_index.mark_interrupted(partial_key, base_filename)
+                    logger.warning(f"Download interrompido ({e.error_code}): {video_id} - parcial mantido para retomada")
+                raise
+            finally:
+                self.bandwidth_scheduler.release(transfer)
+            
+            partial_download_index.release(partial_key, base_filename)
             
             if not info:
                 raise Exception("Falha no download - informações não obtidas")
@@ -70,7 +516,11 @@ class DownloadService:
                 raise Exception("Arquivo baixado não encontrado")
             
             # Converte para formato desejado se necessário
-            final_file = await self._convert_if_needed(downloaded_file, format)            # Obtém informações do áudio
+            source_codec = (info.get('acodec') or '').split('.')[0]
+            progress_tracker.update(download_id, stage="converting")
+            final_file, transcoded = await self._convert_if_needed(
+                downloaded_file, format, source_codec, QUALITY_BITRATES[quality]
+            )            # Obtém informações do áudio
             audio_info = await audio_converter.get_audio_info(final_file)
             
             # Prepara resposta
@@ -80,6 +530,9 @@ class DownloadService:
                 'artist': info.get('uploader', 'Unknown Artist'),
                 'duration': audio_info.get('duration') if audio_info else None,
                 'format': format,
+                'quality': quality,
+                'codec': (audio_info.get('codec') if audio_info else None) or source_codec or None,
+                'transcoded': transcoded,
                 'file_size': file_manager.get_file_size(final_file)
             }
               # Remove arquivo original se foi convertido
@@ -89,16 +542,77 @@ class DownloadService:
             logger.info(f"Download concluído: {final_file}")
             return result
             
+        except DownloadAborted:
+            raise
         except Exception as e:
+            if base_filename is not None:
+                partial_download_index.mark_interrupted(partial_key, base_filename)
             logger.error(f"Erro no download de áudio {video_id}: {e}")
             raise Exception(f"Falha no download: {str(e)}")
     
-    def _download_with_ytdlp(self, url: str, options: dict) -> Optional[dict]:
+    @staticmethod
+    def _make_limit_hook(max_bytes: int, max_seconds: float):
+        """Cria progress hook do yt-dlp que aborta downloads grandes ou lentos demais"""
+        started_at = time.monotonic()
+        
+        def hook(progress: dict):
+            if progress.get('status') != 'downloading':
+                return
+            
+            downloaded = progress.get('downloaded_bytes') or 0
+            total = progress.get('total_bytes')
+            if downloaded > max_bytes or (total and total > max_bytes):
+                raise DownloadLimitExceeded(
+                    "file_too_large",
+                    f"Download excede o limite de {max_bytes // (1024 * 1024)}MB"
+                )
+            
+            if time.monotonic() - started_at > max_seconds:
+                raise DownloadLimitExceeded(
+                    "download_timeout",
+                    f"Download excedeu o tempo máximo de {max_seconds:.0f}s"
+                )
+        
+        return hook
+    
+    @staticmethod
+    def _make_cancel_hook(cancel_event: threading.Event):
+        """Cria progress hook do yt-dlp que interrompe o download quando o evento é sinalizado"""
+        def hook(progress: dict):
+            if cancel_event.is_set():
+                raise DownloadPreempted("preempted", "Download cancelado para liberar recursos")
+        
+        return hook
+    
+    @staticmethod
+    def _get_max_rate(priority: DownloadPriority) -> Optional[int]:
+        """Limite de banda individual (bytes/s) conforme a prioridade"""
+        if priority == DownloadPriority.PREFETCH and settings.prefetch_rate_limit_kbps:
+            return settings.prefetch_rate_limit_kbps * 1024
+        return settings.bandwidth_per_download_kbps * 1024 or None
+    
+    def _run_download(self, url: str, options: dict, transfer: Optional[Transfer]) -> dict:
+        """Executa extract_info com a taxa do agendador de banda aplicada ao vivo na instância"""
+        with self.ytdlp_pool.acquire(options) as ydl:
+            if transfer is not None:
+                # Limite base da instância (ex.: --rate-limit do warm_cache.py) continua valendo
+                base_rate = ydl.params.get('ratelimit')
+                
+                def apply_rate(rate: Optional[int]):
+                    rates = [value for value in (rate, base_rate) if value]
+                    ydl.params['ratelimit'] = min(rates) if rates else None
+                
+                self.bandwidth_scheduler.attach(transfer, apply_rate)
+            try:
+                return ydl.extract_info(url, download=True)
+            finally:
+                if transfer is not None:
+                    self.bandwidth_scheduler.detach(transfer)
+    
+    def _download_with_ytdlp(self, url: str, options: dict, transfer: Optional[Transfer] = None) -> Optional[dict]:
         """Executa download usando yt-dlp com fallbacks para problemas comuns"""
         try:
-            with yt_dlp.YoutubeDL(options) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return info
+            return self._run_download(url, options, transfer)
                 
         except yt_dlp.utils.DownloadError as e:
             error_msg = str(e).lower()
@@ -113,9 +627,7 @@ class DownloadService:
                     'no_check_certificate': True,
                 })
                 try:
-                    with yt_dlp.YoutubeDL(fallback_options) as ydl:
-                        info = ydl.extract_info(url, download=True)
-                        return info
+                    return self._run_download(url, fallback_options, transfer)
                 except Exception as fallback_error:
                     logger.error(f"Fallback SSL também falhou: {fallback_error}")
                     
@@ -132,6 +644,9 @@ class DownloadService:
             logger.error(f"Erro no yt-dlp: {e}")
             raise Exception(f"Falha no download: {str(e)}")
             
+        except DownloadAborted:
+            raise
+            
         except Exception as e:
             logger.error(f"Erro inesperado no yt-dlp: {e}")
             return None
@@ -164,34 +679,47 @@ class DownloadService:
             logger.error(f"Erro ao encontrar arquivo baixado: {e}")
             return None
     
-    async def _convert_if_needed(self, input_file: str, target_format: AudioFormat) -> str:
-        """Converte arquivo para formato desejado se necessário"""
+    async def _convert_if_needed(
+        self,
+        input_file: str,
+        target_format: AudioFormat,
+        source_codec: str = "",
+        bitrate: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Converte arquivo para formato desejado se necessário: (arquivo, transcodificado)"""
         try:
             input_ext = Path(input_file).suffix[1:].lower()  # Remove o ponto
             
-            # Se já está no formato correto, retorna o arquivo original
-            if input_ext == target_format.value:
-                return input_file
-              # Converte para o formato desejado
+            # Formato nativo ou já no formato correto: retorna o arquivo original
+            if target_format == AudioFormat.NATIVE or input_ext == target_format.value:
+                return input_file, False
+            
             output_file = file_manager.get_temp_filepath(
                 prefix="converted", 
                 suffix=f".{target_format.value}"
             )
             
+            # Mesmo codec em outro container (ex: opus dentro de webm): apenas troca o container
+            if source_codec and PASSTHROUGH_CODECS.get(target_format) == source_codec:
+                if await audio_converter.remux_audio(input_file, output_file):
+                    return output_file, False
+                logger.warning(f"Remux falhou, transcodificando: {input_file}")
+            
+            # Converte para o formato desejado
             success = await audio_converter.convert_audio(
-                input_file, output_file, target_format.value
+                input_file, output_file, target_format.value, bitrate
             )
             
             if success and file_manager.file_exists(output_file):
-                return output_file
+                return output_file, True
             else:
                 # Se conversão falhou, retorna arquivo original
                 logger.warning(f"Conversão falhou, usando arquivo original: {input_file}")
-                return input_file
+                return input_file, False
                 
         except Exception as e:
             logger.error(f"Erro na conversão: {e}")
-            return input_file
+            return input_file, False
 
 
 # Global service instance
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import psutil
+from typing import List, Set, Dict, Any
+from models.schemas import AudioFormat
+from services.download_service import download_service, DownloadPriority, DownloadAborted
+from utils.file_manager import file_manager
+from config.settings import settings
+from config.logging import logger
+
+
+class PrefetchService:
+    """Pré-download em background dos primeiros resultados de busca"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.prefetch_queue_size)
+        self.format = AudioFormat(settings.prefetch_format)
+        self._pending: Set[str] = set()
+        self._prefetched: Dict[str, str] = {}  # video_id -> filepath
+        self._cancel_event: threading.Event = threading.Event()
+        self.stats = {
+            'scheduled': 0,
+            'completed': 0,
+            'preempted': 0,
+            'skipped': 0,
+            'failed': 0
+        }
+
+    def schedule(self, video_ids: List[str]) -> int:
+        """Agenda pré-download dos top-N resultados (não bloqueia)"""
+        if not settings.prefetch_enabled:
+            return 0
+
+        scheduled = 0
+        for video_id in video_ids[:settings.prefetch_top_n]:
+            if video_id in self._pending or download_service.get_cached_download(video_id, self.format):
+                continue
+
+            try:
+                self.queue.put_nowait(video_id)
+            except asyncio.QueueFull:
+                break
+
+            self._pending.add(video_id)
+            scheduled += 1
+
+        self.stats['scheduled'] += scheduled
+        return scheduled
+
+    def is_busy(self) -> bool:
+        """Verifica se há carga interativa que deve interromper o pré-download"""
+        if download_service.foreground_downloads > 0:
+            return True
+        return psutil.cpu_percent(interval=None) > settings.prefetch_max_cpu_percent
+
+    def disk_usage_bytes(self) -> int:
+        """Espaço em disco ocupado pelos arquivos pré-baixados ainda existentes"""
+        for video_id, filepath in list(self._prefetched.items()):
+            if not file_manager.file_exists(filepath):
+                del self._prefetched[video_id]
+        return sum(file_manager.get_file_size(fp) for fp in self._prefetched.values())
+
+    async def run(self):
+        """Loop principal do pré-download (executado como tarefa em background)"""
+        logger.info("Pré-download de resultados de busca iniciado")
+
+        while True:
+            video_id = await self.queue.get()
+            try:
+                await self._prefetch(video_id)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.warning(f"Pré-download falhou para {video_id}: {e}")
+            finally:
+                self._pending.discard(video_id)
+
+    async def _prefetch(self, video_id: str):
+        """Baixa um vídeo com prioridade baixa, cancelando se a carga subir"""
+        # Aguarda momento ocioso
+        while self.is_busy():
+            await asyncio.sleep(2)
+
+        if download_service.get_cached_download(video_id, self.format):
+            return
+
+        if self.disk_usage_bytes() >= settings.prefetch_disk_budget_mb * 1024 * 1024:
+            self.stats['skipped'] += 1
+            logger.info(f"Pré-download ignorado (orçamento de disco esgotado): {video_id}")
+            return
+
+        metadata = await download_service.get_video_metadata(video_id)
+        is_valid, error_code, _ = download_service.validate_metadata(metadata, self.format)
+        if not is_valid:
+            self.stats['skipped'] += 1
+            logger.info(f"Pré-download ignorado ({error_code}): {video_id}")
+            return
+
+        self._cancel_event = threading.Event()
+        task = asyncio.create_task(download_service.download_audio(
+            video_id,
+            self.format,
+            priority=DownloadPriority.PREFETCH,
+            cancel_event=self._cancel_event
+        ))
+
+        # Monitora carga interativa enquanto baixa
+        while not task.done():
+            if self.is_busy():
+                self._cancel_event.set()
+            await asyncio.sleep(0.5)
+
+        try:
+            result = task.result()
+        except DownloadAborted as e:
+            self.stats['preempted'] += 1
+            logger.info(f"Pré-download interrompido ({e.error_code}): {video_id}")
+            return
+
+        if result:
+            self._prefetched[video_id] = result['filepath']
+            self.stats['completed'] += 1
+            logger.info(f"Pré-download concluído: {video_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do pré-download"""
+        return {
+            'enabled': settings.prefetch_enabled,
+            'queued': self.queue.qsize(),
+            'disk_usage_bytes': self.disk_usage_bytes(),
+            **self.stats
+        }
+
+
+# Global service instance
+prefetch_service = PrefetchService()
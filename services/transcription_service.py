@@ -1,14 +1,39 @@
 import whisper
-import openai
 import asyncio
 import tempfile
+import threading
+import queue
+import copy
+import multiprocessing
 import os
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+import torch
+import numpy as np
+from typing import List, Optional, AsyncIterator, Tuple, Dict, Any
+from collections import Counter
 from pathlib import Path
-from models.schemas import TranscriptionSegment, TranscriptionEngine
+from models.schemas import TranscriptionSegment, TranscriptionEngine, TranscriptionGranularity
+from utils.cache import SQLiteCache
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.audio_converter import audio_converter
+from utils.file_manager import file_manager
+from utils.audio_chunking import (
+    plan_chunks, stitch_chunks, offset_segments, select_chunk_segments, clip_segments, assign_words
+)
+from utils.audio_decoder import PCMCache, decode_pcm, slice_pcm, get_pcm_duration, detect_silences_pcm
+from utils.whisper_batching import WhisperBatcher
+from utils.openai_transcriber import OpenAITranscriber
+from utils import whisper_worker
 from config.settings import settings
 from config.logging import logger
 
+# faster-whisper (CTranslate2) é opcional: habilita o engine local_fast
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
 # Configurar PATH do FFmpeg se não estiver disponível
 def configure_ffmpeg_path():
     """Configura o PATH para incluir FFmpeg"""
@@ -30,68 +55,527 @@ def configure_ffmpeg_path():
 configure_ffmpeg_path()
 
 
+@asynccontextmanager
+async def _no_slot():
+    yield
+
+
+def get_chunk_workers() -> int:
+    """Processos do pool de transcrição em blocos: configurado ou um por núcleo"""
+    if settings.transcription_chunk_workers > 0:
+        return settings.transcription_chunk_workers
+    return os.cpu_count() or 1
+
+
+def get_batch_size() -> int:
+    """Janelas por micro-lote do Whisper local (0 = desativado)"""
+    return settings.transcription_batch_size if settings.transcription_batch_size > 1 else 0
+
+
+def get_transcription_concurrency() -> int:
+    """Transcrições locais simultâneas: configurada, tamanho do micro-lote ou 1 a cada 4 núcleos"""
+    if settings.transcription_max_concurrency > 0:
+        return settings.transcription_max_concurrency
+    if get_batch_size():
+        return get_batch_size()
+    return max((os.cpu_count() or 1) // 4, 1)
+
+
 class TranscriptionService:
     """Serviço para transcrição de áudio usando Whisper"""
     
     def __init__(self):
         self.local_model = None
         self.model_loaded = False
+        self.model_status = "not_loaded"  # not_loaded | loading | ready | failed
+        self.model_error: Optional[str] = None
         
-        # Configurar OpenAI se API key estiver disponível
-        if settings.openai_api_key:
-            openai.api_key = settings.openai_api_key
+        # Evita que requisições simultâneas carreguem cópias do modelo
+        self._model_lock = threading.Lock()
+        
+        # Transcrições locais limitadas aos núcleos disponíveis; excedente recebe 503
+        self.admission = AdmissionController(
+            max_concurrent=get_transcription_concurrency(),
+            max_queue=settings.transcription_max_queue
+        )
+        
+        # Uma réplica do modelo por vaga (o transcribe do Whisper não é thread-safe)
+        self._idle_models: "queue.LifoQueue" = queue.LifoQueue()
+        
+        # Uma thread por réplica: a inferência nunca espera réplica dentro do executor padrão
+        self._inference_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Micro-lotes entre transcrições simultâneas (criado com o modelo, se habilitado)
+        self.batcher: Optional[WhisperBatcher] = None
+        
+        # Modelo CTranslate2 do engine local_fast (um worker interno por vaga)
+        self.fast_model = None
+        self._fast_model_lock = threading.Lock()
+        
+        # Pool de processos para áudios longos divididos em blocos (criado sob demanda)
+        self._chunk_pool: Optional[ProcessPoolExecutor] = None
+        self._chunk_pool_lock = threading.Lock()
+        
+        # Transcrições por conteúdo do arquivo (persistente, preenchido também pelo warm_cache.py)
+        self.result_cache = SQLiteCache(settings.transcript_cache_file)
+        
+        # Idioma detectado por conteúdo e por video_id (dispensa nova detecção)
+        self.language_cache = SQLiteCache(settings.language_cache_file)
+        
+        # PCM 16 kHz decodificado uma vez por fonte e compartilhado (Whisper, silêncios, janelas)
+        self.pcm_cache = PCMCache(settings.pcm_cache_max_mb * 1024 * 1024)
+        
+        # Cliente da API da OpenAI (conexões reutilizadas; criado no primeiro uso)
+        self.openai_client: Optional[OpenAITranscriber] = None
     
-    async def transcribe_audio(self, file_path: str, engine: TranscriptionEngine = TranscriptionEngine.LOCAL) -> dict:
-        """Transcreve áudio usando engine especificado"""
+    async def transcribe_audio(
+        self,
+        file_path: str,
+        engine: TranscriptionEngine = TranscriptionEngine.LOCAL,
+        content_hash: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        relative_timestamps: bool = True,
+        granularity: TranscriptionGranularity = TranscriptionGranularity.SEGMENT,
+        language: Optional[str] = None,
+        video_id: Optional[str] = None
+    ) -> dict:
+        """Transcreve áudio usando engine especificado (reutiliza transcrições em cache)
+        
+        `content_hash` é o SHA-256 do arquivo quando já conhecido (ex.: calculado durante o upload).
+        Com `start`/`end` apenas essa janela é decodificada e transcrita; os timestamps
+        ficam relativos a `start` ou absolutos (`relative_timestamps=False`).
+        `granularity=word` inclui as palavras de cada segmento (alinhamento extra);
+        `segment` dispensa esse passo.
+        `language` (código do Whisper) dispensa a detecção de idioma; sem ele, é usado o
+        idioma já detectado para o mesmo conteúdo ou para o mesmo `video_id`.
+        """
+        word_timestamps = granularity == TranscriptionGranularity.WORD
+        hint = language
+        
         try:
             logger.info(f"Iniciando transcrição com engine: {engine.value}")
             
-            if engine == TranscriptionEngine.OPENAI:
-                return await self._transcribe_with_openai(file_path)
+            if content_hash is None:
+                loop = asyncio.get_event_loop()
+                content_hash = await loop.run_in_executor(None, self.hash_file, file_path)
+            
+            cache_key = self.get_cache_key(
+                content_hash, engine, start=start, end=end, granularity=granularity.value, language=language
+            )
+            result = self.get_cached_transcription(cache_key)
+            if result:
+                logger.info(f"Transcrição em cache: {cache_key}")
             else:
-                return await self._transcribe_with_local_whisper(file_path)
+                hint = language or self.get_known_language(content_hash, video_id)
+                result = await self._transcribe(file_path, engine, start, end, content_hash, word_timestamps, hint)
+                self.store_transcription(cache_key, result)
+            
+            if not language:
+                self.remember_language(result.get('language'), content_hash, video_id)
+        
+        except AdmissionRejected:
+            raise
                 
         except Exception as e:
             logger.error(f"Erro na transcrição: {e}")
             
             # Fallback: tenta com outro engine se possível
-            if engine == TranscriptionEngine.LOCAL and settings.openai_api_key:
-                logger.info("Tentando fallback para OpenAI API")
-                try:
-                    return await self._transcribe_with_openai(file_path)
-                except Exception as fallback_error:
-                    logger.error(f"Fallback também falhou: {fallback_error}")
+            if engine == TranscriptionEngine.OPENAI or not settings.openai_api_key:
+                raise Exception(f"Falha na transcrição: {str(e)}")
             
-            raise Exception(f"Falha na transcrição: {str(e)}")
+            logger.info("Tentando fallback para OpenAI API")
+            try:
+                result = await self._transcribe(
+                    file_path, TranscriptionEngine.OPENAI, start, end, content_hash, word_timestamps, hint
+                )
+            except Exception as fallback_error:
+                logger.error(f"Fallback também falhou: {fallback_error}")
+                raise Exception(f"Falha na transcrição: {str(e)}")
+        
+        # O cache guarda timestamps absolutos
+        if start is not None and end is not None and relative_timestamps:
+            result = self._shift_result(result, -start)
+        return result
+    
+    async def _transcribe(
+        self,
+        file_path: str,
+        engine: TranscriptionEngine,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> dict:
+        """Executa a transcrição (arquivo inteiro ou janela) no engine indicado"""
+        if start is not None and end is not None:
+            if engine == TranscriptionEngine.OPENAI:
+                return await self._transcribe_window(
+                    file_path, engine, start, end, word_timestamps=word_timestamps, language=language
+                )
+            async with self.admission.slot():
+                return await self._transcribe_window(file_path, engine, start, end, content_hash, word_timestamps, language)
+        
+        if engine == TranscriptionEngine.OPENAI:
+            return await self._transcribe_with_openai(file_path, word_timestamps, language)
+        if engine == TranscriptionEngine.LOCAL_FAST:
+            async with self.admission.slot():
+                return await self._transcribe_with_fast_whisper(file_path, content_hash, word_timestamps, language)
+        async with self.admission.slot():
+            return await self._transcribe_with_local_whisper(file_path, content_hash, word_timestamps, language)
+    
+    async def load_pcm(self, file_path: str, content_hash: Optional[str] = None):
+        """PCM 16 kHz da fonte, decodificado uma única vez por conteúdo (não modificar o buffer)"""
+        loop = asyncio.get_event_loop()
+        if content_hash is None:
+            content_hash = await loop.run_in_executor(None, self.hash_file, file_path)
+        return await loop.run_in_executor(None, self.pcm_cache.get_or_decode, content_hash, file_path)
     
-    async def _transcribe_with_local_whisper(self, file_path: str) -> dict:
+    async def _transcribe_window(
+        self,
+        file_path: str,
+        engine: TranscriptionEngine,
+        start: float,
+        end: float,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> dict:
+        """Transcreve apenas a janela start-end (com margem), em timestamps absolutos
+        
+        Os engines locais recebem só a janela: recortada do PCM compartilhado quando a
+        fonte já está em cache, senão decodificada apenas nesse trecho. A OpenAI recebe
+        um recorte do arquivo.
+        """
+        loop = asyncio.get_event_loop()
+        padding = settings.transcription_window_padding_seconds
+        window_start = max(start - padding, 0.0)
+        window_end = end + padding
+        
+        logger.info(f"Transcrevendo janela {start:.1f}s-{end:.1f}s com engine: {engine.value}")
+        
+        if engine == TranscriptionEngine.OPENAI:
+            window_file = file_manager.get_temp_filepath(prefix="window", suffix=Path(file_path).suffix)
+            try:
+                if not await audio_converter.cut_audio(file_path, window_file, window_start, window_end):
+                    raise Exception("Falha ao recortar janela do áudio")
+                result = await self._transcribe_with_openai(window_file, word_timestamps, language)
+            finally:
+                file_manager.delete_file(window_file)
+            language = result.get('language')
+            segments = [segment.model_dump(exclude_none=True) for segment in result['segments']]
+        
+        else:
+            # Não decodifica a música inteira só para uma janela
+            pcm = self.pcm_cache.get(content_hash) if content_hash else None
+            if pcm is not None:
+                audio = slice_pcm(pcm, window_start, window_end)
+            else:
+                audio = await loop.run_in_executor(None, decode_pcm, file_path, window_start, window_end)
+            
+            if engine == TranscriptionEngine.LOCAL_FAST:
+                model = await loop.run_in_executor(None, self._load_fast_model)
+                
+                def transcribe():
+                    raw_segments, info = model.transcribe(audio, word_timestamps=word_timestamps, language=language)
+                    return [self._fast_segment_to_dict(segment) for segment in raw_segments], info.language
+                
+                segments, language = await loop.run_in_executor(None, transcribe)
+            else:
+                result = await self._run_local_inference(
+                    audio, word_timestamps=word_timestamps, language=language, verbose=False
+                )
+                segments, language = result.get('segments', []), result.get('language')
+        
+        segments = clip_segments(offset_segments(segments, window_start), start, end)
+        return {
+            'language': language,
+            'segments': [TranscriptionSegment(**segment) for segment in segments],
+            'full_text': ' '.join(segment['text'] for segment in segments if segment['text']).strip()
+        }
+    
+    @staticmethod
+    def _shift_result(result: dict, offset: float) -> dict:
+        """Desloca os timestamps dos segmentos e palavras (absolutos -> relativos à janela)"""
+        segments = offset_segments([segment.model_dump(exclude_none=True) for segment in result['segments']], offset)
+        return {
+            **result,
+            'segments': [TranscriptionSegment(**segment) for segment in segments]
+        }
+    
+    @staticmethod
+    def _fast_segment_to_dict(segment) -> Dict[str, Any]:
+        """Converte segmento do faster-whisper para o formato de segmentos do Whisper"""
+        item = {'start': segment.start, 'end': segment.end, 'text': segment.text}
+        if segment.words:
+            item['words'] = [
+                {'start': word.start, 'end': word.end, 'word': word.word, 'probability': word.probability}
+                for word in segment.words
+            ]
+        return item
+    
+    async def stream_transcription(
+        self,
+        file_path: str,
+        engine: TranscriptionEngine = TranscriptionEngine.LOCAL,
+        content_hash: Optional[str] = None,
+        granularity: TranscriptionGranularity = TranscriptionGranularity.SEGMENT,
+        language: Optional[str] = None,
+        video_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Transcreve emitindo os segmentos assim que são finalizados
+        
+        `local_fast` emite segmento a segmento; `local` emite ao fim de cada bloco de
+        áudio (o primeiro é curto); `openai` emite tudo ao final.
+        
+        Gera ('segment', {index, start, end, text[, words]}) e, ao final,
+        ('result', {language, full_text}). O resultado completo vai para o cache.
+        """
+        word_timestamps = granularity == TranscriptionGranularity.WORD
+        
+        if content_hash is None:
+            loop = asyncio.get_event_loop()
+            content_hash = await loop.run_in_executor(None, self.hash_file, file_path)
+        
+        cache_key = self.get_stream_cache_key(content_hash, engine, granularity, language)
+        cached = self.get_cached_transcription(cache_key)
+        if cached:
+            logger.info(f"Transcrição em cache: {cache_key}")
+            for index, segment in enumerate(cached['segments']):
+                yield 'segment', {'index': index, **segment.model_dump(exclude_none=True)}
+            yield 'result', {'language': cached['language'], 'full_text': cached['full_text']}
+            return
+        
+        logger.info(f"Iniciando transcrição em streaming com engine: {engine.value}")
+        
+        segments: List[Dict[str, Any]] = []
+        languages = Counter()
+        hint = language or self.get_known_language(content_hash, video_id)
+        
+        if engine == TranscriptionEngine.OPENAI:
+            # A API não emite resultados parciais
+            result = await self._transcribe_with_openai(file_path, word_timestamps, hint)
+            batches = self._single_batch(result)
+        elif engine == TranscriptionEngine.LOCAL_FAST:
+            batches = self._stream_fast_whisper(file_path, content_hash, word_timestamps, hint)
+        else:
+            batches = self._stream_local_chunks(file_path, content_hash, word_timestamps, hint)
+        
+        async with self.admission.slot() if engine != TranscriptionEngine.OPENAI else _no_slot():
+            async for language, batch in batches:
+                if language:
+                    languages[language] += 1
+                for segment in batch:
+                    yield 'segment', {'index': len(segments), **segment}
+                    segments.append(segment)
+        
+        result = {
+            'language': languages.most_common(1)[0][0] if languages else None,
+            'segments': [TranscriptionSegment(**segment) for segment in segments],
+            'full_text': ' '.join(segment['text'] for segment in segments if segment['text']).strip()
+        }
+        self.store_transcription(cache_key, result)
+        if not language:
+            self.remember_language(result['language'], content_hash, video_id)
+        
+        yield 'result', {'language': result['language'], 'full_text': result['full_text']}
+    
+    @staticmethod
+    async def _single_batch(result: dict):
+        yield result.get('language'), [segment.model_dump(exclude_none=True) for segment in result['segments']]
+    
+    async def _stream_local_chunks(
+        self,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ):
+        """Gera (idioma, segmentos) de cada bloco, em ordem, assim que ficam prontos
+        
+        O Whisper só devolve os segmentos ao fim de cada transcrição: o primeiro bloco é
+        curto (TRANSCRIPTION_STREAM_FIRST_CHUNK_SECONDS) para os primeiros segmentos saírem
+        logo. Os demais têm o tamanho normal: cada bloco é completado até a janela de 30s do
+        Whisper, e blocos curtos multiplicariam o custo do encoder.
+        """
+        loop = asyncio.get_event_loop()
+        
+        pcm = await self.load_pcm(file_path, content_hash)
+        silences = await loop.run_in_executor(None, detect_silences_pcm, pcm)
+        chunks = plan_chunks(
+            get_pcm_duration(pcm),
+            silences,
+            settings.transcription_chunk_seconds,
+            settings.transcription_chunk_overlap_seconds,
+            first_seconds=settings.transcription_stream_first_chunk_seconds
+        )
+        parallel = get_chunk_workers() > 1 or self._use_batching(word_timestamps)
+        
+        # Idioma único para todos os blocos (cada bloco detectaria o seu)
+        if not language:
+            in_pool = get_chunk_workers() > 1 and not self._use_batching(word_timestamps)
+            language = await self._detect_language(pcm, in_pool=in_pool)
+        options = {'word_timestamps': word_timestamps, 'language': language, 'verbose': None}
+        
+        if parallel:
+            # Blocos processados em paralelo; emitidos na ordem
+            futures = [asyncio.ensure_future(self._transcribe_chunk(pcm, chunk, options)) for chunk in chunks]
+            try:
+                for chunk, future in zip(chunks, futures):
+                    result = await future
+                    yield result['language'], select_chunk_segments(chunk, result['segments'])
+            finally:
+                for future in futures:
+                    future.cancel()
+            return
+        
+        # Sem pool: blocos em sequência no modelo do processo
+        for chunk in chunks:
+            result = await self._run_local_inference(slice_pcm(pcm, chunk['start'], chunk['end']), **options)
+            segments = offset_segments(result.get('segments', []), chunk['start'])
+            yield result.get('language'), select_chunk_segments(chunk, segments)
+    
+    async def _stream_fast_whisper(
+        self,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ):
+        """Gera (idioma, [segmento]) conforme o faster-whisper decodifica cada segmento"""
+        loop = asyncio.get_event_loop()
+        model = await loop.run_in_executor(None, self._load_fast_model)
+        pcm = await self.load_pcm(file_path, content_hash)
+        
+        segments_queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+        
+        def produce():
+            try:
+                segments, info = model.transcribe(pcm, word_timestamps=word_timestamps, language=language)
+                # Segmentos são gerados sob demanda: cada um é repassado ao ser decodificado
+                for segment in segments:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(segments_queue.put_nowait, (info.language, segment))
+                loop.call_soon_threadsafe(segments_queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(segments_queue.put_nowait, e)
+        
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await segments_queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                language, segment = item
+                yield language, offset_segments([self._fast_segment_to_dict(segment)], 0.0)
+        finally:
+            # Cliente desconectado: interrompe a decodificação no próximo segmento
+            stop.set()
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """SHA-256 do conteúdo do arquivo (memorizado: arquivos de /download não são relidos)"""
+        return file_manager.get_content_hash(file_path)
+    
+    @staticmethod
+    def get_model_id(engine: TranscriptionEngine) -> str:
+        """Identifica o modelo usado por cada engine (parte da chave de cache)"""
+        if engine == TranscriptionEngine.OPENAI:
+            return "whisper-1"
+        if engine == TranscriptionEngine.LOCAL_FAST:
+            return f"{settings.whisper_model}-{settings.fast_whisper_compute_type}"
+        return settings.whisper_model
+    
+    def get_cache_key(self, content_hash: str, engine: TranscriptionEngine, **options) -> str:
+        """Chave de cache: hash do conteúdo + engine, modelo e opções que alteram o resultado"""
+        parts = [content_hash, engine.value, self.get_model_id(engine)]
+        parts += [f"{name}={value}" for name, value in sorted(options.items()) if value is not None]
+        return ":".join(parts)
+    
+    def get_stream_cache_key(
+        self,
+        content_hash: str,
+        engine: TranscriptionEngine,
+        granularity: TranscriptionGranularity,
+        language: Optional[str] = None
+    ) -> str:
+        """Chave de cache do streaming (blocos diferentes dos de POST /transcribe, resultado próprio)"""
+        return self.get_cache_key(content_hash, engine, granularity=granularity.value, language=language, mode="stream")
+    
+    def get_cached_transcription(self, cache_key: str) -> Optional[dict]:
+        """Retorna transcrição em cache ou None"""
+        cached = self.result_cache.get(cache_key)
+        if not cached:
+            return None
+        return {**cached, 'segments': [TranscriptionSegment(**segment) for segment in cached['segments']]}
+    
+    def get_known_language(self, content_hash: str, video_id: Optional[str] = None) -> Optional[str]:
+        """Idioma já detectado para o conteúdo ou para o vídeo de origem"""
+        language = self.language_cache.get(f"hash:{content_hash}")
+        if not language and video_id:
+            language = self.language_cache.get(f"video:{video_id}")
+        return language
+    
+    def remember_language(self, language: Optional[str], content_hash: str, video_id: Optional[str] = None) -> None:
+        """Guarda o idioma detectado por conteúdo e por vídeo (reutilizado como dica)"""
+        if not language:
+            return
+        self.language_cache.set(f"hash:{content_hash}", language)
+        if video_id:
+            self.language_cache.set(f"video:{video_id}", language)
+    
+    @staticmethod
+    def normalize_language(language: Optional[str]) -> Optional[str]:
+        """Converte nome ou código de idioma (ex.: 'Portuguese', 'pt-BR') para o código do Whisper"""
+        if not language:
+            return None
+        language = language.lower().strip()
+        code = language.split('-')[0]
+        if code in whisper.tokenizer.LANGUAGES:
+            return code
+        return whisper.tokenizer.TO_LANGUAGE_CODE.get(language)
+    
+    def store_transcription(self, cache_key: str, result: dict) -> None:
+        """Armazena transcrição no cache persistente"""
+        self.result_cache.set(cache_key, {
+            **result,
+            'segments': [segment.model_dump(exclude_none=True) for segment in result['segments']]
+        })
+    
+    async def _transcribe_with_local_whisper(
+        self,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> dict:
         """Transcreve usando Whisper local"""
         try:
-            # Carrega modelo se necessário
-            if not self.model_loaded:
-                await self._load_local_model()
+            # Whisper recebe o PCM já decodificado (sem nova chamada ao FFmpeg)
+            pcm = await self.load_pcm(file_path, content_hash)
+            
+            # Áudios longos são divididos em blocos transcritos em paralelo
+            parallel = get_chunk_workers() > 1 or self._use_batching(word_timestamps)
+            if parallel and get_pcm_duration(pcm) >= settings.transcription_chunk_min_seconds:
+                return await self._transcribe_in_chunks(pcm, word_timestamps, language)
             
             logger.info("Transcrevendo com Whisper local...")
             
-            # Executa transcrição em thread separada
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, 
-                lambda: self.local_model.transcribe(
-                    file_path, 
-                    word_timestamps=True,
-                    verbose=False
-                )
+            result = await self._run_local_inference(
+                pcm, 
+                word_timestamps=word_timestamps,
+                language=language,
+                verbose=False
             )
             
             # Processa segmentos
-            segments = []
-            for segment in result.get('segments', []):
-                segments.append(TranscriptionSegment(
-                    start=segment['start'],
-                    end=segment['end'],
-                    text=segment['text'].strip()
-                ))
+            segments = [TranscriptionSegment(**segment) for segment in offset_segments(result.get('segments', []), 0.0)]
             
             return {
                 'language': result.get('language'),
@@ -103,7 +587,194 @@ class TranscriptionService:
             logger.error(f"Erro no Whisper local: {e}")
             raise
     
-    async def _transcribe_with_openai(self, file_path: str) -> dict:
+    async def _transcribe_in_chunks(self, pcm, word_timestamps: bool = False, language: Optional[str] = None) -> dict:
+        """Divide o áudio em silêncios e transcreve os blocos em paralelo"""
+        loop = asyncio.get_event_loop()
+        duration = get_pcm_duration(pcm)
+        
+        silences = await loop.run_in_executor(None, detect_silences_pcm, pcm)
+        chunks = plan_chunks(
+            duration,
+            silences,
+            settings.transcription_chunk_seconds,
+            settings.transcription_chunk_overlap_seconds
+        )
+        logger.info(f"Transcrevendo com Whisper local em {len(chunks)} blocos ({duration:.0f}s)...")
+        
+        if not language:
+            language = await self._detect_language(pcm, in_pool=not self._use_batching(word_timestamps))
+        options = {'word_timestamps': word_timestamps, 'language': language, 'verbose': None}
+        results = await asyncio.gather(*(self._transcribe_chunk(pcm, chunk, options) for chunk in chunks))
+        
+        result = stitch_chunks(chunks, results)
+        return {
+            **result,
+            'segments': [TranscriptionSegment(**segment) for segment in result['segments']]
+        }
+    
+    async def _transcribe_chunk(self, pcm, chunk: Dict[str, float], options: Dict[str, Any]) -> dict:
+        """Transcreve um bloco (timestamps absolutos) nos micro-lotes ou no pool de processos"""
+        audio = slice_pcm(pcm, chunk['start'], chunk['end'])
+        
+        if self._use_batching(options['word_timestamps']):
+            result = await self._run_local_inference(audio, **options)
+            return {
+                'language': result.get('language'),
+                'segments': offset_segments(result.get('segments', []), chunk['start'])
+            }
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._get_chunk_pool(), whisper_worker.transcribe_chunk, audio, chunk['start'], options
+        )
+    
+    async def _detect_language(self, pcm, in_pool: bool = False) -> Optional[str]:
+        """Detecta o idioma uma única vez (primeiros 30s) para repassar a todos os blocos
+        
+        Sem isso cada bloco detecta o seu e trechos da mesma música saem em idiomas diferentes.
+        `in_pool` usa um processo do pool de blocos em vez de uma réplica local.
+        """
+        loop = asyncio.get_event_loop()
+        audio = slice_pcm(pcm, 0.0, whisper.audio.CHUNK_LENGTH)
+        
+        if in_pool:
+            language = await loop.run_in_executor(self._get_chunk_pool(), whisper_worker.detect_language, audio)
+        else:
+            if not self.model_loaded:
+                await self._load_local_model()
+            
+            def detect():
+                with self._replica() as model:
+                    return whisper_worker.detect_language(audio, model)
+            
+            language = await loop.run_in_executor(self._inference_executor, detect)
+        
+        logger.info(f"Idioma detectado: {language}")
+        return language
+    
+    def _get_chunk_pool(self) -> ProcessPoolExecutor:
+        """Cria o pool de processos (cada processo carrega seu modelo e usa um núcleo)"""
+        with self._chunk_pool_lock:
+            if self._chunk_pool is None:
+                workers = get_chunk_workers()
+                self._chunk_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=whisper_worker.init_worker,
+                    initargs=(settings.whisper_model, max((os.cpu_count() or 1) // workers, 1))
+                )
+                logger.info(f"Pool de transcrição em blocos criado: {workers} processos")
+            return self._chunk_pool
+    
+    def shutdown(self):
+        """Encerra o pool de processos de transcrição"""
+        if self._chunk_pool is not None:
+            self._chunk_pool.shutdown(wait=False, cancel_futures=True)
+            self._chunk_pool = None
+        if self.batcher is not None:
+            self.batcher.close()
+        if self._inference_executor is not None:
+            self._inference_executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def _transcribe_with_fast_whisper(
+        self,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> dict:
+        """Transcreve usando faster-whisper (CTranslate2, int8 na CPU)"""
+        try:
+            loop = asyncio.get_event_loop()
+            model = await loop.run_in_executor(None, self._load_fast_model)
+            pcm = await self.load_pcm(file_path, content_hash)
+            
+            logger.info("Transcrevendo com faster-whisper...")
+            
+            def transcribe():
+                segments, info = model.transcribe(pcm, word_timestamps=word_timestamps, language=language)
+                # Segmentos são gerados sob demanda: consome na thread
+                return list(segments), info
+            
+            raw_segments, info = await loop.run_in_executor(None, transcribe)
+            
+            segments = [
+                TranscriptionSegment(**segment)
+                for segment in offset_segments([self._fast_segment_to_dict(segment) for segment in raw_segments], 0.0)
+            ]
+            
+            return {
+                'language': info.language,
+                'segments': segments,
+                'full_text': ''.join(segment.text for segment in raw_segments).strip()
+            }
+            
+        except Exception as e:
+            logger.error(f"Erro no faster-whisper: {e}")
+            raise
+    
+    def _load_fast_model(self):
+        """Carrega modelo faster-whisper (uma única vez)"""
+        with self._fast_model_lock:
+            if self.fast_model is not None:
+                return self.fast_model
+            
+            if WhisperModel is None:
+                raise Exception("faster-whisper não instalado (pip install faster-whisper)")
+            
+            concurrency = self.admission.max_concurrent
+            cpu_threads = settings.fast_whisper_cpu_threads or max((os.cpu_count() or 1) // concurrency, 1)
+            
+            logger.info(
+                f"Carregando modelo faster-whisper: {settings.whisper_model} "
+                f"({settings.fast_whisper_compute_type}, {cpu_threads} threads x {concurrency} workers)"
+            )
+            self.fast_model = WhisperModel(
+                settings.whisper_model,
+                device="cpu",
+                compute_type=settings.fast_whisper_compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=concurrency
+            )
+            logger.info("Modelo faster-whisper carregado com sucesso")
+            return self.fast_model
+    
+    @staticmethod
+    def _use_batching(word_timestamps: bool) -> bool:
+        """Micro-lotes só para segmentos (palavras dependem do alinhamento do transcribe() do Whisper)"""
+        return get_batch_size() > 0 and not word_timestamps
+    
+    async def _run_local_inference(self, audio, **options) -> dict:
+        """Transcreve o PCM no Whisper local: em micro-lotes quando ativos, senão em uma réplica"""
+        if not self.model_loaded:
+            await self._load_local_model()
+        
+        if self.batcher is not None and self._use_batching(options.get('word_timestamps', False)):
+            return await self.batcher.transcribe(audio, options.get('language'))
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._inference_executor, lambda: self._run_local_model(audio, **options))
+    
+    def _run_local_model(self, audio, **options) -> dict:
+        """Executa o Whisper com uma réplica exclusiva do modelo"""
+        with self._replica() as model:
+            return model.transcribe(audio, **options)
+    
+    @contextmanager
+    def _replica(self):
+        """Réplica exclusiva do modelo (sempre livre: uma thread de inferência por réplica)"""
+        model = self._idle_models.get()
+        try:
+            yield model
+        finally:
+            self._idle_models.put(model)
+    
+    async def _transcribe_with_openai(
+        self,
+        file_path: str,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> dict:
         """Transcreve usando API da OpenAI"""
         try:
             if not settings.openai_api_key:
@@ -111,36 +782,23 @@ class TranscriptionService:
             
             logger.info("Transcrevendo com OpenAI API...")
             
-            # Verifica tamanho do arquivo (limite OpenAI: 25MB)
-            file_size_mb = Path(file_path).stat().st_size / (1024 * 1024)
-            if file_size_mb > 25:
-                raise Exception(f"Arquivo muito grande para OpenAI API: {file_size_mb:.1f}MB (máximo: 25MB)")
-            
-            # Executa transcrição
-            loop = asyncio.get_event_loop()
-            
-            with open(file_path, "rb") as audio_file:
-                result = await loop.run_in_executor(
-                    None,
-                    lambda: openai.Audio.transcribe(
-                        model="whisper-1",
-                        file=audio_file,
-                        response_format="verbose_json",
-                        timestamp_granularities=["segment"]
-                    )
-                )
+            # Opus mono de baixo bitrate: upload menor e longe do limite de 25MB
+            upload_file = await self._compress_for_openai(file_path)
+            try:
+                result = await self._get_openai_client().transcribe(upload_file, word_timestamps, language)
+            finally:
+                if upload_file != file_path:
+                    file_manager.delete_file(upload_file)
             
-            # Processa segmentos
-            segments = []
-            for segment in result.get('segments', []):
-                segments.append(TranscriptionSegment(
-                    start=segment['start'],
-                    end=segment['end'],
-                    text=segment['text'].strip()
-                ))
+            # Processa segmentos (a API retorna as palavras em uma lista única)
+            raw_segments = result.get('segments', [])
+            if word_timestamps:
+                raw_segments = assign_words(raw_segments, result.get('words', []))
+            segments = [TranscriptionSegment(**segment) for segment in offset_segments(raw_segments, 0.0)]
             
             return {
-                'language': result.get('language'),
+                # A API retorna o nome do idioma ("portuguese"); padroniza para o código
+                'language': self.normalize_language(result.get('language')),
                 'segments': segments,
                 'full_text': result.get('text', '').strip()
             }
@@ -149,27 +807,117 @@ class TranscriptionService:
             logger.error(f"Erro na API OpenAI: {e}")
             raise
     
-    async def _load_local_model(self, model_name: str = "base"):
-        """Carrega modelo Whisper local"""
+    def _get_openai_client(self) -> OpenAITranscriber:
+        """Cliente da OpenAI compartilhado entre as requisições"""
+        if self.openai_client is None:
+            self.openai_client = OpenAITranscriber(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                max_concurrency=settings.openai_max_concurrency,
+                max_retries=settings.openai_max_retries,
+                timeout=settings.openai_timeout_seconds
+            )
+        return self.openai_client
+    
+    async def _compress_for_openai(self, file_path: str) -> str:
+        """Recodifica o áudio para o envio; em caso de falha, envia o arquivo original"""
+        if not settings.openai_upload_bitrate:
+            return file_path
+        
+        compressed_file = file_manager.get_temp_filepath(prefix="openai", suffix=".ogg")
+        if await audio_converter.compress_for_transcription(file_path, compressed_file, settings.openai_upload_bitrate):
+            return compressed_file
+        
+        file_manager.delete_file(compressed_file)
+        logger.warning("Falha ao comprimir áudio para a OpenAI, enviando arquivo original")
+        return file_path
+    
+    async def close_openai_client(self):
+        """Fecha as conexões com a API da OpenAI"""
+        if self.openai_client is not None:
+            await self.openai_client.close()
+            self.openai_client = None
+    
+    async def _load_local_model(self, model_name: Optional[str] = None, warm_up: bool = False):
+        """Carrega modelo Whisper local (uma única vez, mesmo com chamadas simultâneas)"""
         try:
-            logger.info(f"Carregando modelo Whisper: {model_name}")
-            
             loop = asyncio.get_event_loop()
-            self.local_model = await loop.run_in_executor(
-                None, 
-                lambda: whisper.load_model(model_name)
-            )
-            
-            self.model_loaded = True
-            logger.info("Modelo Whisper carregado com sucesso")
-            
+            await loop.run_in_executor(None, self._load_model_sync, model_name or settings.whisper_model, warm_up)
         except Exception as e:
             logger.error(f"Erro ao carregar modelo Whisper: {e}")
             raise Exception(f"Falha ao carregar Whisper: {str(e)}")
     
+    def _load_model_sync(self, model_name: str, warm_up: bool):
+        with self._model_lock:
+            if self.model_loaded:
+                return
+            
+            self.model_status = "loading"
+            try:
+                logger.info(f"Carregando modelo Whisper: {model_name}")
+                model = whisper.load_model(model_name)
+                
+                if warm_up:
+                    # Inferência com 1s de silêncio para inicializar os kernels
+                    model.transcribe(np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32), word_timestamps=True, verbose=None)
+                    logger.info("Aquecimento do Whisper concluído")
+                
+                if get_batch_size():
+                    # Micro-lotes: uma cópia decodifica os lotes com todos os núcleos;
+                    # o modelo original atende as transcrições com palavras
+                    self.batcher = WhisperBatcher(
+                        copy.deepcopy(model), get_batch_size(), settings.transcription_batch_max_wait_ms
+                    )
+                    self._idle_models.put(model)
+                    logger.info(f"Micro-lotes do Whisper habilitados: até {get_batch_size()} janelas por lote")
+                else:
+                    # Divide os núcleos entre as transcrições simultâneas
+                    concurrency = self.admission.max_concurrent
+                    torch.set_num_threads(max(torch.get_num_threads() // concurrency, 1))
+                    self._idle_models.put(model)
+                    for _ in range(concurrency - 1):
+                        self._idle_models.put(copy.deepcopy(model))
+                
+                self._inference_executor = ThreadPoolExecutor(
+                    max_workers=self._idle_models.qsize(), thread_name_prefix="whisper"
+                )
+                
+                self.local_model = model
+                self.model_loaded = True
+                self.model_status = "ready"
+                self.model_error = None
+                logger.info("Modelo Whisper carregado com sucesso")
+                
+            except Exception as e:
+                self.model_status = "failed"
+                self.model_error = str(e)
+                raise
+    
+    async def warm_up(self):
+        """Carrega e aquece o modelo Whisper no startup (falhas não derrubam a API)"""
+        try:
+            await self._load_local_model(warm_up=True)
+        except Exception as e:
+            logger.warning(f"Aquecimento do Whisper falhou, modelo será carregado sob demanda: {e}")
+        
+        # Inicia os processos do pool de blocos (cada um carrega seu modelo)
+        if get_chunk_workers() > 1:
+            try:
+                pool = self._get_chunk_pool()
+                await asyncio.gather(*(
+                    asyncio.wrap_future(pool.submit(whisper_worker.ping))
+                    for _ in range(get_chunk_workers())
+                ))
+            except Exception as e:
+                logger.warning(f"Falha ao iniciar pool de transcrição em blocos: {e}")
+    
+    def is_ready(self) -> bool:
+        """Indica se o modelo local já pode transcrever sem espera de carregamento"""
+        return self.model_loaded
+    
     def is_supported_format(self, file_path: str) -> bool:
         """Verifica se formato de áudio é suportado"""
-        supported_formats = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.webm'}
+        supported_formats = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.webm', '.opus'}
         file_ext = Path(file_path).suffix.lower()
         return file_ext in supported_formats
     
@@ -177,6 +925,9 @@ class TranscriptionService:
         """Retorna engines de transcrição disponíveis"""
         engines = [TranscriptionEngine.LOCAL.value]
         
+        if WhisperModel is not None:
+            engines.append(TranscriptionEngine.LOCAL_FAST.value)
+        
         if settings.openai_api_key:
             engines.append(TranscriptionEngine.OPENAI.value)
         
@@ -0,0 +1,65 @@
+import pytest
+from models.schemas import AudioFormat, AudioQuality
+from services.download_service import DownloadService, build_format_selector
+from config.settings import settings
+
+
+class TestDownloadMetadata:
+    """Testes para validação de metadados e negociação de formato"""
+
+    def setup_method(self):
+        self.service = DownloadService()
+
+    def test_validate_metadata_public(self):
+        """Vídeo público dentro dos limites é aceito"""
+        metadata = {'availability': 'public', 'duration': 200, 'filesize': 3_000_000}
+        valid, error_code, _ = self.service.validate_metadata(metadata, AudioFormat.MP3)
+        assert valid
+        assert error_code == ""
+
+    def test_validate_metadata_rejections(self):
+        """Vídeos privados, com restrição de idade ou longos demais são rejeitados"""
+        valid, error_code, _ = self.service.validate_metadata({'availability': 'private'})
+        assert not valid and error_code == "video_private"
+
+        valid, error_code, _ = self.service.validate_metadata({'availability': 'public', 'age_limit': 18})
+        assert not valid and error_code == "age_restricted"
+
+        metadata = {'availability': 'public', 'duration': settings.max_duration_seconds + 1}
+        valid, error_code, _ = self.service.validate_metadata(metadata)
+        assert not valid and error_code == "duration_too_long"
+
+    def test_estimate_download_size(self):
+        """WAV é estimado pelo tamanho do PCM gerado"""
+        metadata = {'duration': 100, 'filesize': 1_000_000}
+        assert self.service.estimate_download_size(metadata, AudioFormat.WAV) == 100 * 44100 * 4
+        assert self.service.estimate_download_size(metadata, AudioFormat.OPUS) == 1_000_000
+
+    def test_negotiate_format(self):
+        """Prefere formato aceito que dispense transcodificação"""
+        metadata = {'audio_codecs': ['mp4a', 'opus']}
+
+        assert self.service.negotiate_format(metadata, AudioFormat.MP3) == AudioFormat.MP3
+        assert self.service.negotiate_format(
+            metadata, AudioFormat.MP3, [AudioFormat.OPUS]
+        ) == AudioFormat.OPUS
+        assert self.service.negotiate_format(
+            {'audio_codecs': ['mp4a']}, AudioFormat.MP3, [AudioFormat.OPUS, AudioFormat.M4A]
+        ) == AudioFormat.M4A
+        assert self.service.negotiate_format(
+            {'audio_codecs': []}, AudioFormat.WAV, [AudioFormat.OPUS]
+        ) == AudioFormat.WAV
+
+    def test_build_format_selector(self):
+        """Qualidade define o stream baixado; formato define o codec preferido"""
+        assert build_format_selector(AudioFormat.MP3, AudioQuality.MASTER) == 'bestaudio/best'
+        assert build_format_selector(AudioFormat.OPUS, AudioQuality.MASTER) == 'bestaudio[acodec=opus]/bestaudio/best'
+        assert build_format_selector(AudioFormat.MP3, AudioQuality.TRANSCRIBE).startswith('bestaudio[acodec=opus][abr<=64]')
+
+        selector = build_format_selector(AudioFormat.M4A, AudioQuality.PREVIEW)
+        assert selector.startswith('bestaudio[abr<=160][abr>=96][ext=m4a]')
+        assert selector.endswith('/bestaudio/best')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,30 @@
+import pytest
+from utils.file_response import parse_range, get_media_type
+
+
+class TestFileResponse:
+    """Testes para envio de arquivos com Range"""
+    
+    def test_parse_range(self):
+        """Testa interpretação do cabeçalho Range"""
+        assert parse_range("bytes=0-99", 1000) == (0, 99)
+        assert parse_range("bytes=900-", 1000) == (900, 999)
+        assert parse_range("bytes=-100", 1000) == (900, 999)
+        assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    
+    def test_parse_range_invalid(self):
+        """Intervalos inválidos ou fora do arquivo retornam None"""
+        assert parse_range("bytes=1000-", 1000) is None
+        assert parse_range("bytes=50-10", 1000) is None
+        assert parse_range("bytes=-", 1000) is None
+        assert parse_range("items=0-10", 1000) is None
+    
+    def test_media_type(self):
+        """Testa tipos de mídia de áudio"""
+        assert get_media_type("temp/download_x.mp3") == "audio/mpeg"
+        assert get_media_type("temp/download_x.opus") == "audio/ogg"
+        assert get_media_type("temp/download_x.m4a") == "audio/mp4"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,8 +1,14 @@
 import pytest
+import asyncio
 import tempfile
 import os
 from utils.file_manager import FileManager
 from utils.audio_converter import AudioConverter
+from utils.cache import TTLCache, DiskCache, SQLiteCache
+from utils.partial_downloads import PartialDownloadIndex
+from utils.bandwidth_scheduler import BandwidthScheduler
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.audio_chunking import plan_chunks, stitch_chunks, offset_segments, select_chunk_segments, clip_segments, assign_words
 
 
 class TestFileManager:
@@ -60,6 +66,58 @@ class TestFileManager:
             assert self.file_manager.validate_file_size(temp_path)
         finally:
             os.unlink(temp_path)
+    
+    def test_content_hash_memoized(self, monkeypatch):
+        """Testa hash memorizado (inclusive após touch) e recalculado quando o arquivo muda"""
+        import hashlib
+        
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b'audio')
+            temp_path = tmp.name
+        
+        try:
+            expected = hashlib.sha256(b'audio').hexdigest()
+            assert self.file_manager.get_content_hash(temp_path) == expected
+            
+            self.file_manager.touch_file(temp_path)
+            reads = []
+            real_open = open
+            monkeypatch.setattr('builtins.open', lambda *args, **kwargs: reads.append(args[0]) or real_open(*args, **kwargs))
+            assert self.file_manager.get_content_hash(temp_path) == expected
+            assert reads == []
+            monkeypatch.undo()
+            
+            with open(temp_path, 'ab') as f:
+                f.write(b' changed')
+            assert self.file_manager.get_content_hash(temp_path) == hashlib.sha256(b'audio changed').hexdigest()
+        finally:
+            os.unlink(temp_path)
+    
+    def test_resolve_file_id(self):
+        """Testa resolução de ID público de arquivo"""
+        filepath = self.file_manager.get_temp_filepath(prefix="cut", suffix=".mp3")
+        with open(filepath, 'wb') as f:
+            f.write(b'audio')
+        
+        try:
+            file_id = self.file_manager.get_file_id(filepath)
+            assert self.file_manager.resolve_file_id(file_id) == filepath
+            
+            # Traversal, uploads e arquivos inexistentes são rejeitados
+            assert self.file_manager.resolve_file_id("../" + file_id) is None
+            assert self.file_manager.resolve_file_id("upload_x.mp3") is None
+            assert self.file_manager.resolve_file_id("cut_inexistente.mp3") is None
+            
+            # Caminho retornado por /download e /cut
+            assert self.file_manager.resolve_filepath(filepath) == filepath
+            assert self.file_manager.resolve_filepath(f"/tmp/{file_id}") is None
+        finally:
+            os.unlink(filepath)
+    
+    def test_get_video_id(self):
+        """Testa extração do video_id do nome dos downloads"""
+        assert self.file_manager.get_video_id("temp/download_dQw4w9WgXcQ_20240101_120000_000000.mp3") == "dQw4w9WgXcQ"
+        assert self.file_manager.get_video_id("temp/cut_20240101_120000_000000.mp3") is None
 
 
 class TestAudioConverter:
@@ -90,5 +148,478 @@ class TestAudioConverter:
         assert "maior que a duração" in msg
 
 
+class TestTTLCache:
+    """Testes para cache com expiração"""
+    
+    def test_get_set(self):
+        """Testa armazenamento e leitura"""
+        cache = TTLCache(ttl_seconds=60)
+        assert cache.get("abc") is None
+        
+        cache.set("abc", {"title": "Song"})
+        assert cache.get("abc") == {"title": "Song"}
+        assert "abc" in cache
+    
+    def test_expiration(self):
+        """Testa expiração das entradas"""
+        cache = TTLCache(ttl_seconds=0)
+        cache.set("abc", 1)
+        assert cache.get("abc") is None
+    
+    def test_max_entries(self):
+        """Testa remoção da entrada menos usada"""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestDiskCache:
+    """Testes para o cache persistente em disco"""
+    
+    def test_persistence(self):
+        """Testa leitura por outra instância no mesmo diretório"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            DiskCache(temp_dir).set("abc:mp3:master", {"filepath": "temp/a.mp3"})
+            
+            cache = DiskCache(temp_dir)
+            assert cache.get("abc:mp3:master") == {"filepath": "temp/a.mp3"}
+            assert list(cache.values()) == [{"filepath": "temp/a.mp3"}]
+            
+            cache.delete("abc:mp3:master")
+            assert "abc:mp3:master" not in cache
+    
+    def test_expiration(self):
+        """Testa expiração das entradas"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DiskCache(temp_dir, ttl_seconds=-1)
+            cache.set("abc", 1)
+            assert cache.get("abc") is None
+
+
+class TestSQLiteCache:
+    """Testes para o cache compacto em SQLite"""
+    
+    def test_get_set(self):
+        """Testa persistência e substituição de valores"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_file = os.path.join(temp_dir, "cache.db")
+            cache = SQLiteCache(db_file)
+            assert cache.get("abc") is None
+            
+            cache.set("abc", {"language": "pt", "segments": [{"start": 0.0, "end": 1.5, "text": "Olá"}]})
+            cache.set("abc", {"language": "en", "segments": []})
+            
+            other = SQLiteCache(db_file)
+            assert other.get("abc") == {"language": "en", "segments": []}
+            assert "abc" in other and len(other) == 1
+            
+            other.delete("abc")
+            assert cache.get("abc") is None
+
+
+class TestYoutubeDLPool:
+    """Testes para o pool de instâncias do yt-dlp"""
+    
+    def test_format_override_selects_format(self):
+        """Testa que o formato sobrescrito é o usado na seleção e desfeito na devolução"""
+        pytest.importorskip("yt_dlp")
+        from utils.ytdlp_pool import YoutubeDLPool
+        
+        # Ordenados do pior para o melhor, como o yt-dlp entrega ao seletor
+        formats = [
+            {'format_id': 'low', 'ext': 'webm', 'acodec': 'opus', 'vcodec': 'none', 'abr': 48, 'url': 'http://x/low'},
+            {'format_id': 'high', 'ext': 'webm', 'acodec': 'opus', 'vcodec': 'none', 'abr': 160, 'url': 'http://x/high'}
+        ]
+        pool = YoutubeDLPool({'format': 'bestaudio', 'quiet': True}, size=1)
+        
+        def selected(ydl):
+            return [f['format_id'] for f in ydl._select_formats(formats, ydl.format_selector)]
+        
+        try:
+            with pool.acquire({'format': 'worstaudio'}) as ydl:
+                assert selected(ydl) == ['low']
+            with pool.acquire() as ydl:
+                assert selected(ydl) == ['high']
+        finally:
+            pool.close()
+
+
+class TestPartialDownloadIndex:
+    """Testes para o índice de downloads parciais"""
+    
+    def test_resume_partial(self):
+        """Testa reutilização do nome base quando há arquivo parcial"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = PartialDownloadIndex(os.path.join(temp_dir, "index.json"))
+            base = os.path.join(temp_dir, "download_abc")
+            
+            assert index.acquire("abc:mp3:master", base) == (base, False)
+            with open(base + ".webm.part", "wb") as f:
+                f.write(b"partial")
+            
+            # Chave em uso neste processo: outro download recebe um nome novo, fora do índice
+            other = os.path.join(temp_dir, "download_abc_2")
+            assert index.acquire("abc:mp3:master", other) == (other, False)
+            index.mark_interrupted("abc:mp3:master", other)
+            assert index.acquire("abc:mp3:master", other) == (other, False)
+            
+            # Após a interrupção, o parcial é retomado
+            index.mark_interrupted("abc:mp3:master", base)
+            assert index.acquire("abc:mp3:master", other) == (base, True)
+            
+            index.release("abc:mp3:master", base, delete_files=True)
+            assert not os.path.exists(base + ".webm.part")
+            
+            # Sem arquivo parcial, um novo nome é usado
+            assert index.acquire("abc:mp3:master", other) == (other, False)
+
+
+
+class TestBandwidthScheduler:
+    """Testes para o agendador de banda"""
+    
+    def test_weighted_share(self):
+        """Testa divisão da banda global por peso e limite individual"""
+        async def run():
+            scheduler = BandwidthScheduler(global_limit=1000, max_active=4)
+            interactive = await scheduler.acquire("a", priority=0, weight=4)
+            prefetch = await scheduler.acquire("b", priority=2, weight=1)
+            assert (interactive.rate, prefetch.rate) == (800, 200)
+            
+            # Limite individual libera a sobra para os demais
+            batch = await scheduler.acquire("c", priority=1, weight=2, max_rate=100)
+            assert batch.rate == 100
+            assert interactive.rate + prefetch.rate == 900
+            
+            applied = []
+            scheduler.attach(prefetch, applied.append)
+            scheduler.release(batch)
+            scheduler.release(interactive)
+            assert applied[-1] == prefetch.rate == 1000
+        
+        asyncio.run(run())
+    
+    def test_queue_priority(self):
+        """Testa fila de espera por prioridade quando não há vagas"""
+        async def run():
+            scheduler = BandwidthScheduler(max_active=1)
+            first = await scheduler.acquire("a", priority=1)
+            
+            low = asyncio.create_task(scheduler.acquire("low", priority=2))
+            high = asyncio.create_task(scheduler.acquire("high", priority=0))
+            await asyncio.sleep(0)
+            assert scheduler.get_stats()['queue_length'] == 2
+            
+            scheduler.release(first)
+            admitted = await high
+            assert admitted.name == "high" and not low.done()
+            
+            scheduler.release(admitted)
+            assert (await low).name == "low"
+        
+        asyncio.run(run())
+
+
+
+class TestAdmissionController:
+    """Testes para o controle de admissão"""
+    
+    def test_reject_when_full(self):
+        """Testa rejeição com Retry-After quando vagas e fila estão ocupadas"""
+        async def run():
+            admission = AdmissionController(max_concurrent=1, max_queue=1, initial_duration=10)
+            release = asyncio.Event()
+            
+            async def job():
+                async with admission.slot():
+                    await release.wait()
+            
+            tasks = [asyncio.create_task(job()) for _ in range(2)]
+            await asyncio.sleep(0)
+            assert (admission.active, admission.waiting) == (1, 1)
+            
+            with pytest.raises(AdmissionRejected) as exc_info:
+                async with admission.slot():
+                    pass
+            assert exc_info.value.retry_after == 20
+            
+            release.set()
+            await asyncio.gather(*tasks)
+            assert admission.get_stats()['admitted'] == 2
+            assert not admission.is_full()
+        
+        asyncio.run(run())
+
+
+
+class TestAudioChunking:
+    """Testes para divisão em blocos e junção das transcrições"""
+    
+    def test_plan_chunks_cuts_at_silence(self):
+        """Testa cortes no silêncio mais próximo do tamanho alvo, com sobreposição"""
+        chunks = plan_chunks(130, [(38, 40), (95, 96)], target_seconds=45, overlap_seconds=1)
+        
+        assert [(c['cut_start'], c['cut_end']) for c in chunks] == [(0.0, 39.0), (39.0, 84.0), (84.0, 130)]
+        assert (chunks[1]['start'], chunks[1]['end']) == (38.0, 85.0)
+        assert plan_chunks(60, [], target_seconds=45, overlap_seconds=1) == [
+            {'cut_start': 0.0, 'cut_end': 60, 'start': 0.0, 'end': 60}
+        ]
+    
+    def test_plan_chunks_short_first_chunk(self):
+        """Testa primeiro bloco curto e os demais no tamanho alvo"""
+        chunks = plan_chunks(110, [(9, 11)], target_seconds=45, overlap_seconds=1, first_seconds=10)
+        
+        assert [(c['cut_start'], c['cut_end']) for c in chunks] == [(0.0, 10.0), (10.0, 55.0), (55.0, 110)]
+    
+    def test_stitch_chunks_deduplicates_overlap(self):
+        """Testa remoção dos segmentos repetidos na sobreposição"""
+        chunks = [
+            {'cut_start': 0.0, 'cut_end': 10.0, 'start': 0.0, 'end': 11.0},
+            {'cut_start': 10.0, 'cut_end': 20.0, 'start': 9.0, 'end': 20.0}
+        ]
+        results = [
+            {'language': 'pt', 'segments': [
+                {'start': 0.0, 'end': 5.0, 'text': 'um'},
+                {'start': 9.0, 'end': 10.8, 'text': 'dois'}
+            ]},
+            {'language': 'pt', 'segments': [
+                {'start': 9.1, 'end': 10.8, 'text': 'dois'},
+                {'start': 12.0, 'end': 15.0, 'text': 'três'}
+            ]}
+        ]
+        
+        result = stitch_chunks(chunks, results)
+        assert [s['text'] for s in result['segments']] == ['um', 'dois', 'três']
+        assert result['full_text'] == 'um dois três'
+        assert result['language'] == 'pt'
+    
+    def test_select_chunk_segments_uses_offset_times(self):
+        """Testa seleção incremental dos segmentos de um bloco (transcrição em streaming)"""
+        chunk = {'cut_start': 10.0, 'cut_end': 20.0, 'start': 9.0, 'end': 20.0}
+        segments = offset_segments([
+            {'start': 0.1, 'end': 1.8, 'text': ' dois '},
+            {'start': 3.0, 'end': 6.0, 'text': 'três'}
+        ], chunk['start'])
+        
+        assert segments[0] == {'start': 9.1, 'end': 10.8, 'text': 'dois'}
+        assert select_chunk_segments(chunk, segments) == [{'start': 12.0, 'end': 15.0, 'text': 'três'}]
+    
+    def test_clip_segments_to_window(self):
+        """Testa recorte dos segmentos da margem para a janela start-end"""
+        segments = [
+            {'start': 28.0, 'end': 29.5, 'text': 'antes'},
+            {'start': 29.5, 'end': 32.0, 'text': 'borda'},
+            {'start': 40.0, 'end': 46.0, 'text': 'fim'}
+        ]
+        
+        assert clip_segments(segments, 30.0, 45.0) == [
+            {'start': 30.0, 'end': 32.0, 'text': 'borda'},
+            {'start': 40.0, 'end': 45.0, 'text': 'fim'}
+        ]
+
+    
+    def test_word_timestamps(self):
+        """Testa palavras com deslocamento, recorte e distribuição entre segmentos"""
+        segments = offset_segments([
+            {'start': 0.0, 'end': 2.0, 'text': ' olá mundo', 'words': [
+                {'start': 0.0, 'end': 0.8, 'word': ' olá', 'probability': 0.9},
+                {'start': 1.0, 'end': 2.0, 'word': ' mundo', 'probability': 0.8}
+            ]}
+        ], 10.0)
+        
+        assert segments[0]['words'][1] == {'start': 11.0, 'end': 12.0, 'word': 'mundo', 'probability': 0.8}
+        assert [w['word'] for w in clip_segments(segments, 10.9, 13.0)[0]['words']] == ['mundo']
+        
+        assigned = assign_words(
+            [{'start': 0.0, 'end': 2.0, 'text': 'a b'}, {'start': 2.0, 'end': 4.0, 'text': 'c'}],
+            [{'start': 0.0, 'end': 1.0, 'word': 'a'}, {'start': 1.0, 'end': 2.1, 'word': 'b'}, {'start': 2.5, 'end': 3.0, 'word': 'c'}]
+        )
+        assert [[w['word'] for w in segment['words']] for segment in assigned] == [['a', 'b'], ['c']]
+
+
+class TestAudioDecoder:
+    """Testes para o PCM compartilhado (requer numpy)"""
+    
+    def test_detect_silences_pcm(self):
+        """Testa detecção de silêncio pela energia do PCM"""
+        np = pytest.importorskip("numpy")
+        from utils.audio_decoder import SAMPLE_RATE, detect_silences_pcm, slice_pcm
+        
+        tone = np.full(SAMPLE_RATE, 0.5, dtype=np.float32)
+        pcm = np.concatenate([tone, np.zeros(SAMPLE_RATE, dtype=np.float32), tone])
+        
+        assert detect_silences_pcm(pcm) == [(1.0, 2.0)]
+        assert len(slice_pcm(pcm, 1.0, 2.0)) == SAMPLE_RATE
+    
+    def test_pcm_cache_decodes_once(self, monkeypatch):
+        """Testa decodificação única por fonte e limite de memória"""
+        np = pytest.importorskip("numpy")
+        from utils import audio_decoder
+        
+        calls = []
+        monkeypatch.setattr(audio_decoder, 'decode_pcm', lambda filepath: calls.append(filepath) or np.zeros(1000, dtype=np.float32))
+        cache = audio_decoder.PCMCache(max_bytes=6000)
+        
+        first = cache.get_or_decode('hash_a', 'a.mp3')
+        assert cache.get_or_decode('hash_a', 'a.mp3') is first
+        assert calls == ['a.mp3']
+        
+        # 4000 bytes por fonte: a menos usada é descartada
+        cache.get_or_decode('hash_b', 'b.mp3')
+        assert cache.get('hash_a') is None
+        assert cache.get_stats()['decodes'] == 2
+
+
+class TestWhisperBatching:
+    """Testes para os micro-lotes do Whisper"""
+    
+    def test_concurrent_windows_share_batches(self):
+        """Testa janelas simultâneas decodificadas no mesmo lote"""
+        torch = pytest.importorskip("torch")
+        pytest.importorskip("whisper")
+        from types import SimpleNamespace
+        from utils.whisper_batching import WhisperBatcher
+        
+        batch_sizes = []
+        
+        class FakeModel:
+            device = torch.device("cpu")
+            
+            def decode(self, mel, options):
+                batch_sizes.append(len(mel))
+                return [SimpleNamespace(index=float(window[0, 0])) for window in mel]
+        
+        async def run():
+            batcher = WhisperBatcher(FakeModel(), max_batch_size=4, max_wait_ms=20)
+            try:
+                return await asyncio.gather(*(
+                    batcher.decode(torch.full((80, 3000), float(index)), language="pt", temperature=0.0)
+                    for index in range(6)
+                ))
+            finally:
+                batcher.close()
+        
+        results = asyncio.run(run())
+        assert [result.index for result in results] == [0, 1, 2, 3, 4, 5]
+        assert batch_sizes == [4, 2]
+
+
+class TestOpenAITranscriber:
+    """Testes para o cliente da API de transcrição da OpenAI (servidor local no lugar da API)"""
+    
+    def test_transcribe_retries_transient_errors(self):
+        """Testa retentativa após erro 503 e envio das opções no formulário"""
+        pytest.importorskip("httpx")
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from utils.openai_transcriber import OpenAITranscriber
+        
+        requests_received = []
+        
+        class StandInAPI(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                requests_received.append((self.path, body))
+                
+                if len(requests_received) == 1:
+                    self.send_response(503)
+                    payload = {'error': {'message': 'indisponível'}}
+                else:
+                    self.send_response(200)
+                    payload = {
+                        'language': 'portuguese',
+                        'text': 'Olá mundo',
+                        'segments': [{'start': 0.0, 'end': 1.0, 'text': 'Olá mundo'}],
+                        'words': [{'start': 0.0, 'end': 0.4, 'word': 'Olá'}, {'start': 0.5, 'end': 1.0, 'word': 'mundo'}]
+                    }
+                data = json.dumps(payload).encode()
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInAPI)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        
+        with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as f:
+            f.write(b'audio')
+            filepath = f.name
+        
+        async def run():
+            transcriber = OpenAITranscriber(
+                api_key='test', base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=2
+            )
+            try:
+                return await transcriber.transcribe(filepath, word_timestamps=True, language='pt')
+            finally:
+                await transcriber.close()
+        
+        try:
+            result = asyncio.run(run())
+        finally:
+            server.shutdown()
+            os.unlink(filepath)
+        
+        assert result['language'] == 'portuguese'
+        assert len(result['words']) == 2
+        assert len(requests_received) == 2
+        
+        path, body = requests_received[-1]
+        assert path == '/v1/audio/transcriptions'
+        assert b'name="timestamp_granularities[]"\r\n\r\nword' in body
+        assert b'name="language"\r\n\r\npt' in body
+    
+    def test_new_event_loop_gets_own_connections(self):
+        """Testa uso da mesma instância em asyncio.run sucessivos (conexões keep-alive)"""
+        pytest.importorskip("httpx")
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from utils.openai_transcriber import OpenAITranscriber
+        
+        class StandInAPI(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                data = json.dumps({'language': 'english', 'text': 'hi', 'segments': []}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInAPI)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        
+        with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as f:
+            f.write(b'audio')
+            filepath = f.name
+        
+        transcriber = OpenAITranscriber(
+            api_key='test', base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0
+        )
+        try:
+            # Um loop por item, como no warm_cache.py
+            for _ in range(2):
+                assert asyncio.run(transcriber.transcribe(filepath))['text'] == 'hi'
+        finally:
+            server.shutdown()
+            os.unlink(filepath)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
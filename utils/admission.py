@@ -0,0 +1,81 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator
+
+
+class AdmissionRejected(Exception):
+    """Fila cheia: a requisição deve ser repetida após `retry_after` segundos"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Capacidade esgotada, tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Controle de admissão com concorrência limitada e fila de espera finita
+
+    Até `max_concurrent` execuções simultâneas e `max_queue` aguardando; além disso
+    a requisição é rejeitada com um Retry-After estimado pela duração média das
+    execuções (média móvel exponencial).
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, initial_duration: float = 30.0):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max(max_queue, 0)
+        self.avg_duration = initial_duration
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.stats = {
+            'admitted': 0,
+            'rejected': 0
+        }
+
+    def is_full(self) -> bool:
+        """Verifica se novas requisições seriam rejeitadas"""
+        return self.active + self.waiting >= self.max_concurrent + self.max_queue
+
+    def retry_after(self) -> int:
+        """Segundos estimados até a fila atual escoar"""
+        backlog = self.active + self.waiting
+        return max(math.ceil(self.avg_duration * backlog / self.max_concurrent), 1)
+
+    def check(self) -> None:
+        """Rejeita imediatamente se não houver espaço (antes de trabalho caro como uploads)"""
+        if self.is_full():
+            self.stats['rejected'] += 1
+            raise AdmissionRejected(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Aguarda vaga de execução ou rejeita se a fila estiver cheia"""
+        self.check()
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.stats['admitted'] += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * (time.monotonic() - started_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de ocupação"""
+        return {
+            **self.stats,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'waiting': self.waiting,
+            'avg_duration_seconds': round(self.avg_duration, 2)
+        }
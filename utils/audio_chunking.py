@@ -0,0 +1,129 @@
+"""Divisão de áudios longos em blocos (cortes em silêncios) e junção das transcrições"""
+from collections import Counter
+from typing import List, Tuple, Dict, Any, Optional
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target_seconds: float,
+    overlap_seconds: float,
+    first_seconds: Optional[float] = None
+) -> List[Dict[str, float]]:
+    """Planeja blocos de ~target_seconds com cortes no meio dos silêncios
+
+    Cada bloco tem o trecho nominal (cut_start-cut_end), que não se sobrepõe
+    aos vizinhos, e o trecho decodificado (start-end), estendido por
+    overlap_seconds de cada lado para não cortar palavras na borda.
+    `first_seconds` encurta só o primeiro bloco (primeiros segmentos saem antes).
+    """
+    cuts = [0.0]
+    size = first_seconds or target_seconds
+
+    # O último bloco absorve a sobra para não gerar um bloco muito curto
+    while duration - cuts[-1] > size * 1.5:
+        ideal = cuts[-1] + size
+        window = size * 0.25
+        candidates = [
+            (start + end) / 2 for start, end in silences
+            if abs((start + end) / 2 - ideal) <= window
+        ]
+        cuts.append(min(candidates, key=lambda cut: abs(cut - ideal)) if candidates else ideal)
+        size = target_seconds
+
+    cuts.append(duration)
+
+    return [
+        {
+            'cut_start': cut_start,
+            'cut_end': cut_end,
+            'start': max(cut_start - overlap_seconds, 0.0),
+            'end': min(cut_end + overlap_seconds, duration)
+        }
+        for cut_start, cut_end in zip(cuts, cuts[1:])
+    ]
+
+
+def offset_segments(segments: List[Dict[str, Any]], offset: float) -> List[Dict[str, Any]]:
+    """Converte segmentos do Whisper de uma janela para timestamps absolutos
+
+    As palavras (`word_timestamps`) são mantidas quando presentes.
+    """
+    converted = []
+    for segment in segments:
+        item = {
+            'start': segment['start'] + offset,
+            'end': segment['end'] + offset,
+            'text': segment['text'].strip()
+        }
+        if segment.get('words'):
+            item['words'] = [
+                {
+                    'start': word['start'] + offset,
+                    'end': word['end'] + offset,
+                    'word': word['word'].strip(),
+                    'probability': word.get('probability')
+                }
+                for word in segment['words']
+            ]
+        converted.append(item)
+    return converted
+
+
+def clip_segments(segments: List[Dict[str, Any]], start: float, end: float) -> List[Dict[str, Any]]:
+    """Segmentos (e palavras) que se sobrepõem à janela start-end, com os tempos limitados a ela"""
+    clipped = []
+    for segment in segments:
+        if segment['end'] <= start or segment['start'] >= end:
+            continue
+
+        item = {**segment, 'start': max(segment['start'], start), 'end': min(segment['end'], end)}
+        if segment.get('words'):
+            item['words'] = clip_segments(segment['words'], start, end)
+        clipped.append(item)
+    return clipped
+
+
+def select_chunk_segments(chunk: Dict[str, float], segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Segmentos que pertencem ao bloco: o meio do segmento está no trecho nominal
+
+    Segmentos da sobreposição aparecem em dois blocos vizinhos; assim fica
+    apenas uma cópia.
+    """
+    return [
+        segment for segment in segments
+        if chunk['cut_start'] <= (segment['start'] + segment['end']) / 2 < chunk['cut_end']
+    ]
+
+
+def stitch_chunks(chunks: List[Dict[str, float]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Junta as transcrições dos blocos (timestamps já absolutos), sem duplicar a sobreposição"""
+    segments = []
+    for chunk, result in zip(chunks, results):
+        segments.extend(select_chunk_segments(chunk, result['segments']))
+
+    segments.sort(key=lambda segment: segment['start'])
+
+    languages = Counter(result.get('language') for result in results if result.get('language'))
+
+    return {
+        'language': languages.most_common(1)[0][0] if languages else None,
+        'segments': segments,
+        'full_text': ' '.join(segment['text'] for segment in segments if segment['text']).strip()
+    }
+
+
+def assign_words(segments: List[Dict[str, Any]], words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Distribui uma lista única de palavras (ex.: API da OpenAI) entre os segmentos pelo tempo"""
+    assigned = [{**segment, 'words': []} for segment in segments]
+    if not assigned:
+        return assigned
+
+    index = 0
+    for word in sorted(words, key=lambda word: word['start']):
+        middle = (word['start'] + word['end']) / 2
+        while index + 1 < len(assigned) and assigned[index + 1]['start'] <= middle:
+            index += 1
+        assigned[index]['words'].append(word)
+
+    return assigned
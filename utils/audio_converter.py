@@ -3,14 +3,39 @@ import asyncio
 import subprocess
 import json
 import os
+import shutil
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
+from config.settings import settings
+from config.logging import logger
 
 
 # Configure FFmpeg paths
 FFMPEG_PATH = r"c:\Projects\ShortTune API\ffmpeg-master-latest-win64-gpl\bin\ffmpeg.exe"
 FFPROBE_PATH = r"c:\Projects\ShortTune API\ffmpeg-master-latest-win64-gpl\bin\ffprobe.exe"
 
+# Codec FFmpeg usado para cada formato de saída
+FORMAT_CODECS = {
+    'mp3': 'libmp3lame',
+    'wav': 'pcm_s16le',
+    'opus': 'libopus',
+    'm4a': 'aac'
+}
+
+
+def get_ffmpeg_binary() -> str:
+    """Executável do FFmpeg: FFMPEG_PATH configurado ou o encontrado no PATH"""
+    return settings.ffmpeg_path or shutil.which('ffmpeg') or 'ffmpeg'
+
+
+async def run_ffmpeg(args: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """Executa o FFmpeg em uma thread, sem bloquear o event loop"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None,
+        lambda: subprocess.run([get_ffmpeg_binary(), *args], capture_output=True, text=True, timeout=timeout)
+    )
+
 
 class AudioConverter:
     """Conversor e manipulador de áudio usando FFmpeg"""
@@ -88,13 +113,18 @@ class AudioConverter:
             return False
     
     @staticmethod
-    async def convert_audio(input_file: str, output_file: str, target_format: str) -> bool:
-        """Converte áudio para outro formato"""
+    async def convert_audio(input_file: str, output_file: str, target_format: str, bitrate: Optional[str] = None) -> bool:
+        """Converte áudio para outro formato (bitrate opcional para formatos com perda)"""
         try:
             cmd = [
                 FFMPEG_PATH,
                 '-i', input_file,
-                '-acodec', 'libmp3lame' if target_format == 'mp3' else 'aac',
+                '-vn',
+                '-acodec', FORMAT_CODECS.get(target_format, 'aac')
+            ]
+            if bitrate and target_format != 'wav':
+                cmd += ['-b:a', bitrate]
+            cmd += [
                 '-y',  # Overwrite output file
                 output_file
             ]
@@ -111,6 +141,30 @@ class AudioConverter:
             print(f"Error converting audio: {e}")
             return False
     
+    @staticmethod
+    async def remux_audio(input_file: str, output_file: str) -> bool:
+        """Troca o container sem recodificar o áudio (ex: webm/opus -> .opus)"""
+        try:
+            args = [
+                '-i', input_file,
+                '-vn',
+                '-c:a', 'copy',
+                '-y',  # Overwrite output file
+                output_file
+            ]
+            
+            result = await run_ffmpeg(args, timeout=60)
+            
+            if result.returncode == 0:
+                return os.path.exists(output_file) and os.path.getsize(output_file) > 0
+            else:
+                logger.error(f"Erro do FFmpeg ao trocar container: {result.stderr[-500:]}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Erro ao trocar container do áudio: {e}")
+            return False
+    
     @staticmethod
     async def normalize_audio(input_file: str, output_file: str) -> bool:
         """Normaliza o volume do áudio"""
@@ -135,6 +189,34 @@ class AudioConverter:
             print(f"Error normalizing audio: {e}")
             return False
     
+    @staticmethod
+    async def compress_for_transcription(input_file: str, output_file: str, bitrate: str = "24k") -> bool:
+        """Recodifica para opus mono 16 kHz de baixo bitrate (fala, upload menor para APIs)"""
+        try:
+            args = [
+                '-i', input_file,
+                '-vn',
+                '-ac', '1',
+                '-ar', '16000',
+                '-c:a', 'libopus',
+                '-b:a', bitrate,
+                '-application', 'voip',
+                '-y',  # Overwrite output file
+                output_file
+            ]
+            
+            result = await run_ffmpeg(args, timeout=180)
+            
+            if result.returncode == 0:
+                return os.path.exists(output_file) and os.path.getsize(output_file) > 0
+            else:
+                logger.error(f"Erro do FFmpeg ao comprimir áudio: {result.stderr[-500:]}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Erro ao comprimir áudio: {e}")
+            return False
+    
     @staticmethod
     async def validate_time_range(filepath: str, start_time: float, end_time: float) -> Tuple[bool, str]:
         """Valida se o range de tempo é válido para o arquivo"""
@@ -0,0 +1,146 @@
+"""Decodificação de áudio para PCM (entrada do Whisper) via pipe do FFmpeg
+
+Cada fonte é decodificada uma única vez em PCM mono float32 de 16 kHz; o buffer
+(em cache por hash do conteúdo) é repassado ao Whisper e às demais análises.
+"""
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+from utils.audio_converter import get_ffmpeg_binary
+
+# Taxa de amostragem esperada pelo Whisper
+SAMPLE_RATE = 16000
+
+
+def decode_pcm(filepath: str, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """Decodifica o arquivo (ou apenas a janela start-end) em PCM mono float32 de 16 kHz"""
+    cmd = [get_ffmpeg_binary(), '-nostdin', '-threads', '0']
+    if start:
+        cmd += ['-ss', str(start)]
+    cmd += ['-i', filepath]
+    if end is not None:
+        cmd += ['-t', str(end - (start or 0))]
+    cmd += ['-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-']
+
+    result = subprocess.run(cmd, capture_output=True, timeout=180)
+    if result.returncode != 0:
+        raise Exception(f"Falha ao decodificar áudio: {result.stderr.decode(errors='ignore')[-500:]}")
+
+    return np.frombuffer(result.stdout, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def slice_pcm(pcm: np.ndarray, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """Janela start-end (segundos) do PCM, sem cópia"""
+    first = int((start or 0) * SAMPLE_RATE)
+    last = int(end * SAMPLE_RATE) if end is not None else len(pcm)
+    return pcm[max(first, 0):last]
+
+
+def get_pcm_duration(pcm: np.ndarray) -> float:
+    """Duração do PCM em segundos"""
+    return len(pcm) / SAMPLE_RATE
+
+
+def detect_silences_pcm(
+    pcm: np.ndarray,
+    noise_db: float = -35,
+    min_silence: float = 0.4,
+    frame_seconds: float = 0.02
+) -> List[Tuple[float, float]]:
+    """Detecta trechos de silêncio (início, fim) em segundos pela energia RMS de cada quadro"""
+    frame = int(SAMPLE_RATE * frame_seconds)
+    count = len(pcm) // frame
+    if count == 0:
+        return []
+
+    frames = pcm[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    quiet = np.concatenate(([False], rms < 10 ** (noise_db / 20), [False]))
+
+    # Bordas das sequências de quadros silenciosos
+    edges = np.flatnonzero(quiet[1:] != quiet[:-1])
+    return [
+        (start * frame_seconds, end * frame_seconds)
+        for start, end in zip(edges[::2], edges[1::2])
+        if (end - start) * frame_seconds >= min_silence
+    ]
+
+
+class PCMCache:
+    """Cache LRU do PCM decodificado por fonte (hash do conteúdo), limitado em bytes
+
+    Requisições simultâneas para a mesma fonte aguardam uma única decodificação.
+    Os buffers são compartilhados entre os consumidores e não devem ser modificados.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._decoding: Dict[str, threading.Lock] = {}
+        self.stats = {
+            'hits': 0,
+            'decodes': 0
+        }
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Retorna PCM em cache ou None"""
+        with self._lock:
+            pcm = self._data.get(key)
+            if pcm is not None:
+                self._data.move_to_end(key)
+            return pcm
+
+    def set(self, key: str, pcm: np.ndarray) -> None:
+        """Armazena PCM, descartando os menos usados acima do limite"""
+        if pcm.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.nbytes
+
+            self._data[key] = pcm
+            self.total_bytes += pcm.nbytes
+
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+
+    def get_or_decode(self, key: str, filepath: str) -> np.ndarray:
+        """Retorna o PCM da fonte, decodificando o arquivo apenas na primeira vez"""
+        pcm = self.get(key)
+        if pcm is not None:
+            self.stats['hits'] += 1
+            return pcm
+
+        with self._lock:
+            key_lock = self._decoding.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                pcm = self.get(key)
+                if pcm is not None:
+                    self.stats['hits'] += 1
+                    return pcm
+
+                pcm = decode_pcm(filepath)
+                self.stats['decodes'] += 1
+                self.set(key, pcm)
+                return pcm
+        finally:
+            with self._lock:
+                self._decoding.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso"""
+        return {
+            **self.stats,
+            'entries': len(self._data),
+            'size_mb': round(self.total_bytes / (1024 * 1024), 1),
+            'max_size_mb': round(self.max_bytes / (1024 * 1024), 1)
+        }
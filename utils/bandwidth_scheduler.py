@@ -0,0 +1,215 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List
+
+
+class Transfer:
+    """Transferência registrada no agendador de banda"""
+
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        weight: float,
+        expected_bytes: Optional[int],
+        max_rate: Optional[int]
+    ):
+        self.name = name
+        self.priority = priority
+        self.weight = weight
+        self.expected_bytes = expected_bytes
+        self.max_rate = max_rate
+        self.rate: Optional[int] = None
+        self.apply_rate: Optional[Callable[[Optional[int]], None]] = None
+        self.downloaded_bytes = 0
+        self.speed = 0.0
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+
+class BandwidthScheduler:
+    """Agendador de banda para downloads simultâneos (fair share ponderado)
+
+    Limita quantos downloads transferem ao mesmo tempo (os demais aguardam em fila
+    por prioridade e tamanho) e divide o limite global de banda entre os ativos
+    proporcionalmente ao peso de cada um, respeitando o limite individual. Downloads
+    pequenos recebem peso dobrado. As taxas são recalculadas a cada entrada/saída
+    e aplicadas ao vivo no `ratelimit` da instância yt-dlp em uso.
+    """
+
+    def __init__(self, global_limit: int = 0, max_active: int = 6, small_transfer_bytes: int = 0):
+        self.global_limit = global_limit
+        self.max_active = max(max_active, 1)
+        self.small_transfer_bytes = small_transfer_bytes
+        self._active: List[Transfer] = []
+        self._waiting: List[tuple] = []  # heap: (prioridade, tamanho, ordem, transferência, loop, future)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'completed': 0,
+            'max_queue_length': 0,
+            'total_wait_seconds': 0.0
+        }
+
+    async def acquire(
+        self,
+        name: str,
+        priority: int,
+        weight: float = 1.0,
+        expected_bytes: Optional[int] = None,
+        max_rate: Optional[int] = None
+    ) -> Transfer:
+        """Aguarda vaga para transferir (sem bloquear o event loop)"""
+        transfer = Transfer(name, priority, weight, expected_bytes, max_rate)
+
+        with self._lock:
+            if len(self._active) < self.max_active and not self._waiting:
+                self._admit(transfer)
+                return transfer
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            heapq.heappush(
+                self._waiting,
+                (priority, expected_bytes or 0, next(self._seq), transfer, loop, future)
+            )
+            self.stats['queued'] += 1
+            self.stats['max_queue_length'] = max(self.stats['max_queue_length'], len(self._waiting))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.release(transfer)
+            raise
+
+        return transfer
+
+    def attach(self, transfer: Transfer, apply_rate: Callable[[Optional[int]], None]) -> None:
+        """Associa a transferência à instância que a executa e aplica a taxa atual"""
+        with self._lock:
+            transfer.apply_rate = apply_rate
+            apply_rate(transfer.rate)
+
+    def detach(self, transfer: Transfer) -> None:
+        """Desassocia a instância (ex.: antes de devolvê-la ao pool)"""
+        with self._lock:
+            transfer.apply_rate = None
+
+    def release(self, transfer: Transfer) -> None:
+        """Libera a vaga da transferência (concluída, abortada ou desistente da fila)"""
+        with self._lock:
+            if transfer in self._active:
+                self._active.remove(transfer)
+                self.stats['completed'] += 1
+            else:
+                self._waiting = [entry for entry in self._waiting if entry[3] is not transfer]
+                heapq.heapify(self._waiting)
+
+            while self._waiting and len(self._active) < self.max_active:
+                _, _, _, waiting, loop, future = heapq.heappop(self._waiting)
+                if future.done():
+                    continue
+                self._admit(waiting)
+                loop.call_soon_threadsafe(self._resolve, future)
+
+            self._rebalance()
+
+    def make_ytdlp_hook(self, transfer: Transfer):
+        """Cria progress hook do yt-dlp que registra velocidade e tamanho real"""
+        def hook(progress: dict):
+            if progress.get('status') != 'downloading':
+                return
+
+            transfer.downloaded_bytes = progress.get('downloaded_bytes') or 0
+            transfer.speed = progress.get('speed') or 0.0
+
+            total = progress.get('total_bytes') or progress.get('total_bytes_estimate')
+            if total and not transfer.expected_bytes:
+                with self._lock:
+                    transfer.expected_bytes = int(total)
+                    self._rebalance()
+
+        return hook
+
+    @staticmethod
+    def _resolve(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def _admit(self, transfer: Transfer) -> None:
+        transfer.started_at = time.monotonic()
+        self.stats['admitted'] += 1
+        self.stats['total_wait_seconds'] += transfer.started_at - transfer.queued_at
+        self._active.append(transfer)
+        self._rebalance()
+
+    def _effective_weight(self, transfer: Transfer) -> float:
+        if self.small_transfer_bytes and transfer.expected_bytes and transfer.expected_bytes <= self.small_transfer_bytes:
+            return transfer.weight * 2
+        return transfer.weight
+
+    def _rebalance(self) -> None:
+        """Distribui o limite global (water-filling ponderado) e aplica as novas taxas"""
+        rates: Dict[int, Optional[int]] = {}
+
+        if not self.global_limit:
+            for transfer in self._active:
+                rates[id(transfer)] = transfer.max_rate
+        else:
+            remaining = float(self.global_limit)
+            pending = list(self._active)
+
+            while pending:
+                share = remaining / sum(self._effective_weight(t) for t in pending)
+                capped = [
+                    t for t in pending
+                    if t.max_rate and t.max_rate <= share * self._effective_weight(t)
+                ]
+                if not capped:
+                    for t in pending:
+                        rates[id(t)] = max(int(share * self._effective_weight(t)), 1)
+                    break
+
+                # Quem atinge o limite individual devolve a sobra para os demais
+                for t in capped:
+                    rates[id(t)] = t.max_rate
+                    remaining -= t.max_rate
+                pending = [t for t in pending if t not in capped]
+
+        for transfer in self._active:
+            rate = rates.get(id(transfer))
+            if rate != transfer.rate:
+                transfer.rate = rate
+                if transfer.apply_rate:
+                    transfer.apply_rate(rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de banda e de fila"""
+        with self._lock:
+            admitted = self.stats['admitted']
+            return {
+                **self.stats,
+                'total_wait_seconds': round(self.stats['total_wait_seconds'], 2),
+                'avg_wait_seconds': round(self.stats['total_wait_seconds'] / admitted, 2) if admitted else 0.0,
+                'global_limit_kbps': self.global_limit // 1024 if self.global_limit else None,
+                'max_active': self.max_active,
+                'active': len(self._active),
+                'queue_length': len(self._waiting),
+                'throughput_kbps': round(sum(t.speed for t in self._active) / 1024, 1),
+                'transfers': [
+                    {
+                        'name': t.name,
+                        'priority': int(t.priority),
+                        'rate_kbps': t.rate // 1024 if t.rate else None,
+                        'speed_kbps': round(t.speed / 1024, 1),
+                        'downloaded_mb': round(t.downloaded_bytes / (1024 * 1024), 2),
+                        'expected_mb': round(t.expected_bytes / (1024 * 1024), 2) if t.expected_bytes else None
+                    }
+                    for t in self._active
+                ]
+            }
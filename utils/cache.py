@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Optional, Hashable, Iterator
+
+
+class TTLCache:
+    """Cache em memória com expiração por tempo e limite de entradas (LRU)"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna valor em cache ou None se ausente/expirado"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena valor no cache"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove entrada do cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache:
+    """Cache persistente em disco (um arquivo JSON por chave)
+
+    Compartilhável entre processos: workers do servidor e ferramentas offline
+    (ex.: warm_cache.py) leem e escrevem no mesmo diretório. Escritas são
+    atômicas, então leitores nunca veem uma entrada pela metade.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna valor em cache ou None se ausente/expirado"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if self.ttl_seconds is not None and entry.get('created_at', 0) + self.ttl_seconds < time.time():
+            path.unlink(missing_ok=True)
+            return None
+
+        return entry.get('value')
+
+    def set(self, key: str, value: Any) -> None:
+        """Armazena valor (serializável em JSON) no cache"""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'created_at': time.time(), 'value': value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str) -> None:
+        """Remove entrada do cache"""
+        self._path(key).unlink(missing_ok=True)
+
+    def values(self) -> Iterator[Any]:
+        """Itera sobre os valores armazenados"""
+        for path in self.directory.glob("*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield json.load(f).get('value')
+            except (FileNotFoundError, ValueError):
+                continue
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+
+class SQLiteCache:
+    """Cache persistente e compacto em um único arquivo SQLite
+
+    Valores são JSON comprimido com zlib. Leituras por chave primária levam
+    poucos milissegundos, e o modo WAL permite leitores simultâneos em vários
+    processos (workers do servidor e warm_cache.py).
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por thread (chamadas vêm do event loop e do executor)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna valor em cache ou None se ausente"""
+        row = self._connect().execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: Any) -> None:
+        """Armazena valor (serializável em JSON) no cache"""
+        data = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)",
+                (key, data, time.time())
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove entrada do cache"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def __contains__(self, key: str) -> bool:
+        return self._connect().execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
@@ -1,19 +1,36 @@
 import os
+import re
+import hashlib
 import aiofiles
 import asyncio
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set, Callable, Tuple, Dict
 from datetime import datetime, timedelta
 from config.settings import settings
 from config.logging import logger
 
 
+# Prefixos de arquivos que podem ser servidos por /files (uploads ficam de fora)
+SERVABLE_PREFIXES = ("download_", "converted_", "cut_")
+
+# Nome dos downloads: download_<video_id>_<timestamp>.<ext>
+DOWNLOAD_NAME_PATTERN = re.compile(r'^download_([A-Za-z0-9_-]{11})_\d{8}_\d{6}_\d{6}\.')
+
+# Hashes de conteúdo memorizados (os mais antigos são descartados)
+HASH_MEMO_MAX_ENTRIES = 1024
+
+
 class FileManager:
     """Gerenciador de arquivos temporários"""
     
     def __init__(self):
         self.temp_dir = Path(settings.temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
+        
+        # SHA-256 por caminho, válido enquanto tamanho e data de modificação não mudarem
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._hashes_lock = threading.Lock()
     
     def get_temp_filepath(self, prefix: str = "audio", suffix: str = ".mp3") -> str:
         """Gera um caminho único para arquivo temporário"""
@@ -21,6 +38,33 @@ class FileManager:
         filename = f"{prefix}_{timestamp}{suffix}"
         return str(self.temp_dir / filename)
     
+    def get_file_id(self, filepath: str) -> str:
+        """Retorna ID público do arquivo (nome dentro do diretório temporário)"""
+        return Path(filepath).name
+    
+    def resolve_file_id(self, file_id: str) -> Optional[str]:
+        """Converte ID público em caminho, aceitando apenas downloads e cortes do diretório temporário"""
+        if not file_id or not file_id.startswith(SERVABLE_PREFIXES) or Path(file_id).name != file_id:
+            return None
+        
+        filepath = self.temp_dir / file_id
+        if filepath.resolve().parent != self.temp_dir.resolve() or not filepath.is_file():
+            return None
+        
+        return str(filepath)
+    
+    def get_video_id(self, filepath: str) -> Optional[str]:
+        """Extrai o video_id do nome de um arquivo gerado por /download"""
+        match = DOWNLOAD_NAME_PATTERN.match(Path(filepath).name)
+        return match.group(1) if match else None
+    
+    def resolve_filepath(self, filepath: str) -> Optional[str]:
+        """Valida o `filepath` retornado por /download ou /cut (mesmas regras do ID público)"""
+        if not filepath or Path(filepath).resolve().parent != self.temp_dir.resolve():
+            return None
+        
+        return self.resolve_file_id(Path(filepath).name)
+    
     async def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
         """Salva arquivo enviado pelo usuário"""
         try:
@@ -36,6 +80,34 @@ class FileManager:
             logger.error(f"Erro ao salvar arquivo: {e}")
             raise
     
+    async def save_upload_stream(self, upload, filename: str, chunk_size: int = 1024 * 1024) -> Tuple[str, str]:
+        """Copia o upload em blocos calculando o SHA-256 na mesma passada: (caminho, hash)
+        
+        O corpo da requisição já foi recebido pelo Starlette (arquivo temporário do
+        UploadFile); o hash é calculado durante a cópia, sem uma segunda leitura.
+        """
+        filepath = self.get_temp_filepath(prefix="upload", suffix=f"_{filename}")
+        sha256 = hashlib.sha256()
+        
+        try:
+            async with aiofiles.open(filepath, 'wb') as f:
+                while True:
+                    chunk = await upload.read(chunk_size)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    await f.write(chunk)
+            
+            logger.info(f"Arquivo salvo: {filepath}")
+            content_hash = sha256.hexdigest()
+            self._remember_hash(filepath, content_hash)
+            return filepath, content_hash
+            
+        except Exception as e:
+            logger.error(f"Erro ao salvar arquivo: {e}")
+            self.delete_file(filepath)
+            raise
+    
     def file_exists(self, filepath: str) -> bool:
         """Verifica se arquivo existe"""
         return Path(filepath).exists()
@@ -47,6 +119,47 @@ class FileManager:
         except:
             return 0
     
+    def touch_file(self, filepath: str) -> None:
+        """Atualiza data de modificação (adia a limpeza automática)"""
+        try:
+            memo = self._get_memoized_hash(filepath)
+            Path(filepath).touch(exist_ok=True)
+            # Conteúdo inalterado: o hash memorizado continua valendo
+            if memo:
+                self._remember_hash(filepath, memo)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar arquivo {filepath}: {e}")
+    
+    def get_content_hash(self, filepath: str) -> str:
+        """SHA-256 do conteúdo, memorizado por (caminho, tamanho, data de modificação)"""
+        content_hash = self._get_memoized_hash(filepath)
+        if content_hash:
+            return content_hash
+        
+        sha256 = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        content_hash = sha256.hexdigest()
+        self._remember_hash(filepath, content_hash)
+        return content_hash
+    
+    def _get_memoized_hash(self, filepath: str) -> Optional[str]:
+        stat = os.stat(filepath)
+        with self._hashes_lock:
+            memo = self._hashes.get(filepath)
+        if memo and memo[:2] == (stat.st_size, stat.st_mtime_ns):
+            return memo[2]
+        return None
+    
+    def _remember_hash(self, filepath: str, content_hash: str) -> None:
+        stat = os.stat(filepath)
+        with self._hashes_lock:
+            self._hashes.pop(filepath, None)
+            self._hashes[filepath] = (stat.st_size, stat.st_mtime_ns, content_hash)
+            if len(self._hashes) > HASH_MEMO_MAX_ENTRIES:
+                del self._hashes[next(iter(self._hashes))]
+    
     def delete_file(self, filepath: str) -> bool:
         """Remove arquivo do sistema"""
         try:
@@ -59,17 +172,26 @@ class FileManager:
             logger.error(f"Erro ao remover arquivo {filepath}: {e}")
             return False
     
-    async def cleanup_old_files(self, max_age_hours: Optional[int] = None) -> int:
-        """Remove arquivos temporários antigos"""
+    def delete_matching(self, pattern: str) -> int:
+        """Remove arquivos do diretório temporário que casam com o padrão glob"""
+        removed_count = 0
+        for file_path in self.temp_dir.glob(pattern):
+            if file_path.is_file() and self.delete_file(str(file_path)):
+                removed_count += 1
+        return removed_count
+    
+    async def cleanup_old_files(self, max_age_hours: Optional[int] = None, keep: Optional[Set[str]] = None) -> int:
+        """Remove arquivos temporários antigos (exceto os caminhos absolutos em `keep`)"""
         if max_age_hours is None:
             max_age_hours = settings.cleanup_interval_hours
         
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
         removed_count = 0
+        keep = keep or set()
         
         try:
             for file_path in self.temp_dir.iterdir():
-                if file_path.is_file():
+                if file_path.is_file() and str(file_path.resolve()) not in keep:
                     file_time = datetime.fromtimestamp(file_path.stat().st_mtime)
                     if file_time < cutoff_time:
                         self.delete_file(str(file_path))
@@ -93,11 +215,14 @@ class FileManager:
 file_manager = FileManager()
 
 
-async def start_cleanup_task():
+async def start_cleanup_task(get_pinned_files: Optional[Callable[[], Set[str]]] = None):
     """Inicia tarefa de limpeza automática"""
+    from utils.partial_downloads import partial_download_index
+    
     while True:
         try:
-            await file_manager.cleanup_old_files()
+            await file_manager.cleanup_old_files(keep=get_pinned_files() if get_pinned_files else None)
+            partial_download_index.prune(settings.cleanup_interval_hours * 3600)
             # Aguarda 1 hora
             await asyncio.sleep(settings.cleanup_interval_hours * 3600)
         except Exception as e:
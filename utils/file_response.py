@@ -0,0 +1,163 @@
+import os
+import re
+import mimetypes
+import anyio
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+# Tipos de mídia que o módulo mimetypes nem sempre conhece
+AUDIO_MEDIA_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.opus': 'audio/ogg',
+    '.ogg': 'audio/ogg',
+    '.m4a': 'audio/mp4',
+    '.webm': 'audio/webm',
+    '.flac': 'audio/flac'
+}
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFileResponse(Response):
+    """Envia um trecho de arquivo; usa zero-copy (sendfile) quando o servidor ASGI suporta"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, length: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+
+        if scope["method"].upper() == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        # Extensão ASGI de zero-copy: o servidor envia o arquivo direto do kernel
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Interpreta cabeçalho Range (intervalo único); retorna (início, fim) inclusivo ou None se inválido"""
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or file_size == 0:
+        return None
+
+    start_str, end_str = match.groups()
+    if not start_str and not end_str:
+        return None
+
+    if not start_str:
+        # Sufixo: últimos N bytes
+        suffix = int(end_str)
+        if suffix == 0:
+            return None
+        return max(file_size - suffix, 0), file_size - 1
+
+    start = int(start_str)
+    end = int(end_str) if end_str else file_size - 1
+    if start >= file_size or end < start:
+        return None
+
+    return start, min(end, file_size - 1)
+
+
+def get_media_type(path: str) -> str:
+    """Determina Content-Type pelo nome do arquivo"""
+    ext = os.path.splitext(path)[1].lower()
+    return AUDIO_MEDIA_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def build_file_response(
+    request: Request,
+    path: str,
+    cache_max_age: int = 3600,
+    accel_redirect_prefix: Optional[str] = None
+) -> Response:
+    """Monta resposta de arquivo com Range, ETag/Last-Modified e Cache-Control"""
+    stat = os.stat(path)
+    file_size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{file_size:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    media_type = get_media_type(path)
+
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": f"private, max-age={cache_max_age}",
+        "accept-ranges": "bytes"
+    }
+
+    # Validação condicional (If-None-Match tem precedência sobre If-Modified-Since)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()
+            if int(stat.st_mtime) <= since:
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    # Delegação ao proxy (nginx X-Accel-Redirect): sendfile, Range e cache ficam com o nginx
+    if accel_redirect_prefix:
+        headers["x-accel-redirect"] = f"{accel_redirect_prefix.rstrip('/')}/{os.path.basename(path)}"
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    start, end = 0, file_size - 1
+    status_code = 200
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        byte_range = parse_range(range_header, file_size)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{file_size}"}
+            )
+
+        start, end = byte_range
+        status_code = 206
+        headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+
+    length = max(end - start + 1, 0)
+    headers["content-length"] = str(length)
+
+    return RangeFileResponse(path, start, length, status_code, headers, media_type)
@@ -0,0 +1,147 @@
+"""Cliente assíncrono da API de transcrição da OpenAI
+
+Uma instância mantém as conexões abertas entre requisições (pool do httpx), limita
+os envios simultâneos e repete falhas transitórias (429, 5xx, timeout e conexão)
+com backoff exponencial e jitter, respeitando o Retry-After da API.
+Conexões e semáforo pertencem ao event loop que os criou: um novo loop (ex.: um
+asyncio.run por item no warm_cache.py) recebe um pool próprio.
+"""
+import asyncio
+import random
+from pathlib import Path
+from typing import Optional, Dict, Any
+import httpx
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Limite de upload da API
+MAX_UPLOAD_MB = 25
+
+# Respostas repetidas (sobrecarga ou falha temporária da API)
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+
+class OpenAITranscriber:
+    """Transcrição via API da OpenAI com conexões reutilizadas e concorrência limitada"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        timeout: float = 120.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'bytes_sent': 0
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pool de conexões do event loop atual (recriado se o loop mudou)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Conexões do loop anterior (já encerrado) são descartadas
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={'Authorization': f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency
+                ),
+                timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self.client
+
+    async def transcribe(
+        self,
+        file_path: str,
+        word_timestamps: bool = False,
+        language: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Envia o arquivo e retorna o verbose_json da API (segments, words, language, text)"""
+        size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+        if size_mb > MAX_UPLOAD_MB:
+            raise Exception(f"Arquivo muito grande para OpenAI API: {size_mb:.1f}MB (máximo: {MAX_UPLOAD_MB}MB)")
+
+        # Conteúdo em memória: cada retentativa reenvia o arquivo desde o início
+        content = await asyncio.get_event_loop().run_in_executor(None, Path(file_path).read_bytes)
+        data = {
+            'model': "whisper-1",
+            'response_format': "verbose_json",
+            'timestamp_granularities[]': ["segment", "word"] if word_timestamps else ["segment"]
+        }
+        if language:
+            data['language'] = language
+
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    self.stats['requests'] += 1
+                    self.stats['bytes_sent'] += len(content)
+                    response = await client.post(
+                        "audio/transcriptions", data=data, files={'file': (Path(file_path).name, content)}
+                    )
+            except httpx.TransportError as e:
+                error = Exception(f"Falha de conexão com a OpenAI API: {e}")
+            else:
+                if response.status_code == 200:
+                    return response.json()
+
+                error = Exception(f"OpenAI API retornou {response.status_code}: {self._error_message(response)}")
+                if response.status_code not in RETRY_STATUS:
+                    self.stats['failures'] += 1
+                    raise error
+                retry_after = response.headers.get('retry-after')
+
+            if attempt == self.max_retries:
+                break
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+        self.stats['failures'] += 1
+        raise error
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera antes da retentativa: Retry-After da API ou backoff exponencial com jitter"""
+        try:
+            if retry_after is not None and 0 <= float(retry_after) <= 60:
+                return float(retry_after)
+        except ValueError:
+            pass
+        return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        try:
+            return response.json()['error']['message']
+        except Exception:
+            return response.text[:200]
+
+    async def close(self) -> None:
+        """Fecha as conexões do pool (se pertencem ao event loop atual)"""
+        if self.client is not None and self._loop is asyncio.get_running_loop():
+            await self.client.aclose()
+        self.client = None
+        self._semaphore = None
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso"""
+        return dict(self.stats)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Any, Tuple
+from config.settings import settings
+from config.logging import logger
+
+
+class PartialDownloadIndex:
+    """Índice em disco de downloads incompletos, para retomar de onde pararam
+
+    O yt-dlp continua a partir do arquivo .part (offset em bytes) ou do estado
+    .ytdl (fragmentos concluídos) desde que o mesmo nome de saída seja reutilizado;
+    o índice guarda esse nome por (video_id, formato, qualidade).
+    Uma chave em uso neste processo não é retomada por outro download (ex.: prefetch
+    ainda sendo cancelado): o segundo recebe um nome novo, fora do índice.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = Path(index_file)
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Chaves com download em andamento neste processo -> nome base em uso
+        self._held: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        tmp_file = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.index_file)
+
+    @staticmethod
+    def _partial_files(base: str):
+        base_path = Path(base)
+        return [
+            p for p in base_path.parent.glob(f"{base_path.name}.*")
+            if p.is_file() and (p.name.endswith('.part') or p.name.endswith('.ytdl') or '.part-Frag' in p.name)
+        ]
+
+    @staticmethod
+    def _owned_by_other_process(entry: Dict[str, Any]) -> bool:
+        """Verifica se outro worker vivo está baixando o mesmo arquivo agora (o próprio processo usa _held)"""
+        pid = entry.get('pid')
+        if not pid or pid == os.getpid():
+            return False
+        if time.time() - entry.get('updated_at', 0) > settings.max_download_seconds:
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, key: str, new_base: str) -> Tuple[str, bool]:
+        """Retorna nome base a usar no download e se é uma retomada"""
+        with self._lock:
+            if key in self._held:
+                return new_base, False
+
+            data = self._load()
+            entry = data.get(key)
+
+            if entry and self._partial_files(entry['base']) and not self._owned_by_other_process(entry):
+                base, resumed = entry['base'], True
+            else:
+                base, resumed = new_base, False
+
+            data[key] = {'base': base, 'pid': os.getpid(), 'updated_at': time.time()}
+            self._save(data)
+            self._held[key] = base
+
+        return base, resumed
+
+    def release(self, key: str, base: str, delete_files: bool = False) -> None:
+        """Remove entrada do índice (download concluído ou descartado)"""
+        with self._lock:
+            # Download fora do índice (chave já em uso): não mexe na entrada do outro
+            if self._held.get(key) == base:
+                del self._held[key]
+                data = self._load()
+                data.pop(key, None)
+                self._save(data)
+
+        if delete_files:
+            for path in self._partial_files(base):
+                path.unlink(missing_ok=True)
+
+    def mark_interrupted(self, key: str, base: str) -> None:
+        """Libera a entrada para retomada imediata por outra requisição ou worker"""
+        with self._lock:
+            if self._held.get(key) != base:
+                return
+            del self._held[key]
+
+            data = self._load()
+            if key in data:
+                data[key]['pid'] = None
+                self._save(data)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Remove parciais abandonados (sem arquivos ou sem atividade recente)"""
+        removed = 0
+        now = time.time()
+
+        with self._lock:
+            data = self._load()
+            for key, entry in list(data.items()):
+                files = self._partial_files(entry['base'])
+                last_activity = max([entry.get('updated_at', 0)] + [p.stat().st_mtime for p in files])
+
+                # Sem arquivos: só descarta após o tempo máximo de um download (pode estar começando)
+                stale = now - last_activity > (max_age_seconds if files else settings.max_download_seconds)
+                if stale:
+                    for path in files:
+                        path.unlink(missing_ok=True)
+                    del data[key]
+                    removed += 1
+
+            self._save(data)
+
+        if removed:
+            logger.info(f"Downloads parciais abandonados removidos: {removed}")
+        return removed
+
+
+# Global partial download index
+partial_download_index = PartialDownloadIndex(settings.partial_index_file)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, AsyncIterator
+from utils.cache import TTLCache
+from config.logging import logger
+
+
+# Estágios que encerram o acompanhamento
+TERMINAL_STAGES = {"completed", "failed"}
+
+
+class ProgressTracker:
+    """Acompanha progresso de downloads e distribui eventos aos assinantes (SSE)"""
+
+    def __init__(self, ttl_seconds: int = 900, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._states = TTLCache(ttl_seconds=ttl_seconds, max_entries=5000)
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._last_publish: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, download_id: str, **fields) -> None:
+        """Registra um novo download (deve ser chamado no event loop)"""
+        self._loop = asyncio.get_running_loop()
+        self._states.delete(download_id)
+        self.update(download_id, stage="queued", **fields)
+
+    def update(self, download_id: Optional[str], stage: Optional[str] = None, force: bool = False, **fields) -> None:
+        """Atualiza estado do download; seguro para chamadas a partir de threads"""
+        if not download_id:
+            return
+
+        state = dict(self._states.get(download_id) or {"download_id": download_id})
+        stage_changed = stage is not None and stage != state.get("stage")
+        if stage is not None:
+            state["stage"] = stage
+        state.update(fields)
+        state["updated_at"] = time.time()
+        self._states.set(download_id, state)
+
+        # Limita frequência de eventos de progresso (hooks do yt-dlp são muito frequentes)
+        now = time.monotonic()
+        if not (stage_changed or force) and now - self._last_publish.get(download_id, 0) < self.min_interval:
+            return
+        self._last_publish[download_id] = now
+
+        if state.get("stage") in TERMINAL_STAGES:
+            self._last_publish.pop(download_id, None)
+
+        self._dispatch(download_id, state)
+
+    def get_state(self, download_id: str) -> Optional[dict]:
+        """Retorna último estado conhecido do download"""
+        return self._states.get(download_id)
+
+    def make_ytdlp_hook(self, download_id: Optional[str]):
+        """Cria progress hook do yt-dlp que publica bytes, velocidade e ETA"""
+        def hook(progress: dict):
+            status = progress.get("status")
+            if status == "downloading":
+                self.update(
+                    download_id,
+                    stage="downloading",
+                    downloaded_bytes=progress.get("downloaded_bytes"),
+                    total_bytes=progress.get("total_bytes") or progress.get("total_bytes_estimate"),
+                    speed=progress.get("speed"),
+                    eta=progress.get("eta")
+                )
+            elif status == "finished":
+                self.update(
+                    download_id,
+                    stage="downloaded",
+                    downloaded_bytes=progress.get("downloaded_bytes") or progress.get("total_bytes")
+                )
+
+        return hook
+
+    async def subscribe(self, download_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """Gera eventos do download; None indica heartbeat"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._subscribers.setdefault(download_id, []).append(queue)
+
+        try:
+            current = self.get_state(download_id)
+            if current:
+                yield current
+                if current.get("stage") in TERMINAL_STAGES:
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                yield event
+                if event.get("stage") in TERMINAL_STAGES:
+                    return
+        finally:
+            subscribers = self._subscribers.get(download_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(download_id, None)
+
+    def _dispatch(self, download_id: str, state: dict) -> None:
+        """Entrega evento às filas dos assinantes no event loop"""
+        if not self._subscribers.get(download_id) or self._loop is None:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._publish(download_id, state)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._publish, download_id, state)
+            except RuntimeError as e:
+                logger.warning(f"Não foi possível publicar progresso de {download_id}: {e}")
+
+    def _publish(self, download_id: str, state: dict) -> None:
+        for queue in list(self._subscribers.get(download_id, [])):
+            queue.put_nowait(dict(state))
+
+
+# Global progress tracker instance
+progress_tracker = ProgressTracker()
@@ -329,8 +329,16 @@ def translate_text(text: str, src_lang: str, tgt_lang: str, engine: str = "ai_mo
     else:  # "ai_model"
         return translate_with_ai(text, src_lang, tgt_lang)
 
-def translate_segments(segments: List[dict], target_lang: Optional[str], translation_engine: str = "ai_model") -> List[dict]:
-    """Traduz segmentos usando o engine de tradução especificado"""
+def translate_segments(
+    segments: List[dict],
+    target_lang: Optional[str],
+    translation_engine: str = "ai_model",
+    source_lang: Optional[str] = None
+) -> List[dict]:
+    """Traduz segmentos usando o engine de tradução especificado
+    
+    Com `source_lang` (ex.: idioma da transcrição) a detecção por segmento é dispensada.
+    """
     if not target_lang:
         return segments
     
@@ -338,7 +346,7 @@ def translate_segments(segments: List[dict], target_lang: Optional[str], transla
     result = []
     
     for seg in segments:
-        src_lang = detect_language(seg['text'])
+        src_lang = normalize_language_code(source_lang) if source_lang else detect_language(seg['text'])
         translation = translate_text(seg['text'], src_lang, target_lang, translation_engine)
         seg_out = dict(seg)
         seg_out['translation'] = translation
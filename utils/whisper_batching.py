@@ -0,0 +1,203 @@
+"""Agendador de inferência do Whisper com micro-lotes entre requisições
+
+Cada transcrição percorre o áudio em janelas de 30s; as janelas de requisições
+simultâneas (com as mesmas opções de decodificação) são reunidas em um único
+lote no encoder/decoder, aguardando no máximo `max_wait_ms` para completar o lote.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+import torch
+from whisper.audio import log_mel_spectrogram, pad_or_trim, N_FRAMES, N_SAMPLES, HOP_LENGTH, SAMPLE_RATE
+from whisper.decoding import DecodingOptions
+from whisper.tokenizer import get_tokenizer
+
+# Mesmos critérios do transcribe() do Whisper
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class WhisperBatcher:
+    """Reúne janelas de mel de transcrições simultâneas em lotes de decodificação
+
+    O modelo é usado por uma única thread (os hooks de kv-cache não são thread-safe);
+    o ganho vem de cada passagem processar várias janelas de uma vez.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_ms: int):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[Tuple, List[Tuple[torch.Tensor, asyncio.Future]]] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-batch")
+        self._tokenizer = None
+        self.stats = {
+            'batches': 0,
+            'windows': 0
+        }
+
+    async def decode(self, mel: torch.Tensor, **options):
+        """Decodifica uma janela de mel (N_FRAMES) no próximo lote com as mesmas opções"""
+        future = asyncio.get_running_loop().create_future()
+        key = tuple(sorted(options.items()))
+        self._pending.setdefault(key, []).append((mel, future))
+
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self):
+        """Despacha os lotes enquanto houver janelas pendentes"""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                # Aguarda um pouco por mais janelas se nenhum lote estiver completo
+                if all(len(items) < self.max_batch_size for items in self._pending.values()):
+                    await asyncio.sleep(self.max_wait)
+
+                key = max(self._pending, key=lambda options: len(self._pending[options]))
+                items = self._pending.pop(key)
+                if len(items) > self.max_batch_size:
+                    self._pending[key] = items[self.max_batch_size:]
+                    items = items[:self.max_batch_size]
+
+                # Requisições canceladas (cliente desconectado) saem do lote
+                items = [(mel, future) for mel, future in items if not future.done()]
+                if not items:
+                    continue
+
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor, self._decode_batch, [mel for mel, _ in items], key
+                    )
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._dispatcher = None
+
+    def _decode_batch(self, mels: List[torch.Tensor], key: Tuple) -> list:
+        """Uma passagem do encoder/decoder com todas as janelas do lote"""
+        fp16 = self.model.device.type == 'cuda'
+        options = DecodingOptions(**dict(key), fp16=fp16)
+        batch = torch.stack(mels).to(self.model.device)
+        if fp16:
+            batch = batch.half()
+
+        self.stats['batches'] += 1
+        self.stats['windows'] += len(mels)
+        return self.model.decode(batch, options)
+
+    def _get_tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(
+                self.model.is_multilingual, num_languages=self.model.num_languages, task="transcribe"
+            )
+        return self._tokenizer
+
+    async def _decode_with_fallback(self, mel: torch.Tensor, language: Optional[str]):
+        """Repete a janela com temperaturas maiores se o texto sair repetitivo ou improvável"""
+        result = None
+        for temperature in TEMPERATURES:
+            result = await self.decode(mel, language=language, temperature=temperature, task="transcribe")
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                break
+            if result.compression_ratio <= COMPRESSION_RATIO_THRESHOLD and result.avg_logprob >= LOGPROB_THRESHOLD:
+                break
+        return result
+
+    async def transcribe(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcreve o PCM 16 kHz (mesmo formato de saída do transcribe() do Whisper, sem palavras)
+
+        Segue o laço de janelas do Whisper, sem condicionar cada janela no texto
+        anterior (assim as janelas de requisições diferentes podem ir no mesmo lote).
+        """
+        loop = asyncio.get_running_loop()
+        mel = await loop.run_in_executor(
+            None, lambda: log_mel_spectrogram(torch.from_numpy(audio), self.model.dims.n_mels, padding=N_SAMPLES)
+        )
+        content_frames = mel.shape[-1] - N_FRAMES
+        tokenizer = self._get_tokenizer()
+
+        input_stride = N_FRAMES // self.model.dims.n_audio_ctx
+        time_precision = input_stride * HOP_LENGTH / SAMPLE_RATE
+        segments: List[Dict[str, Any]] = []
+        seek = 0
+
+        while seek < content_frames:
+            time_offset = seek * HOP_LENGTH / SAMPLE_RATE
+            segment_size = min(N_FRAMES, content_frames - seek)
+            mel_segment = pad_or_trim(mel[:, seek:seek + N_FRAMES], N_FRAMES)
+
+            result = await self._decode_with_fallback(mel_segment, language)
+            # Idioma detectado na primeira janela vale para as seguintes
+            language = language or result.language
+
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                seek += segment_size
+                continue
+
+            tokens = torch.tensor(result.tokens)
+            timestamp_tokens = tokens.ge(tokenizer.timestamp_begin)
+            single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+            consecutive = (torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0] + 1).tolist()
+
+            def add_segment(start: float, end: float, segment_tokens: List[int]):
+                text = tokenizer.decode([token for token in segment_tokens if token < tokenizer.eot])
+                if end > start and text.strip():
+                    segments.append({'start': start, 'end': end, 'text': text})
+
+            if consecutive:
+                if single_timestamp_ending:
+                    consecutive.append(len(tokens))
+                last_slice = 0
+                for current_slice in consecutive:
+                    sliced = tokens[last_slice:current_slice].tolist()
+                    add_segment(
+                        time_offset + (sliced[0] - tokenizer.timestamp_begin) * time_precision,
+                        time_offset + (sliced[-1] - tokenizer.timestamp_begin) * time_precision,
+                        sliced
+                    )
+                    last_slice = current_slice
+
+                if single_timestamp_ending:
+                    seek += segment_size
+                else:
+                    # Continua a partir do último timestamp (nunca parado na mesma posição)
+                    last_timestamp = tokens[last_slice - 1].item() - tokenizer.timestamp_begin
+                    seek += max(last_timestamp * input_stride, 1)
+            else:
+                duration = segment_size * HOP_LENGTH / SAMPLE_RATE
+                timestamps = tokens[timestamp_tokens.nonzero().flatten()]
+                if len(timestamps) > 0 and timestamps[-1].item() != tokenizer.timestamp_begin:
+                    duration = (timestamps[-1].item() - tokenizer.timestamp_begin) * time_precision
+                add_segment(time_offset, time_offset + duration, tokens.tolist())
+                seek += segment_size
+
+        return {
+            'language': language,
+            'segments': segments,
+            'text': ''.join(segment['text'] for segment in segments)
+        }
+
+    def close(self) -> None:
+        """Encerra a thread de decodificação"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso"""
+        return {
+            **self.stats,
+            'avg_batch_size': round(self.stats['windows'] / self.stats['batches'], 2) if self.stats['batches'] else 0,
+            'max_batch_size': self.max_batch_size,
+            'pending': sum(len(items) for items in self._pending.values())
+        }
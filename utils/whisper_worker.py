@@ -0,0 +1,40 @@
+"""Funções executadas nos processos do pool de transcrição em blocos"""
+from typing import Dict, Any, Optional
+import torch
+import whisper
+from utils.audio_chunking import offset_segments
+
+# Modelo carregado uma vez por processo
+_model: Optional[Any] = None
+
+
+def init_worker(model_name: str, threads: int) -> None:
+    """Carrega o modelo Whisper no processo (um núcleo por processo por padrão)"""
+    global _model
+    torch.set_num_threads(threads)
+    _model = whisper.load_model(model_name)
+
+
+def ping() -> bool:
+    """Tarefa vazia usada para iniciar os processos antecipadamente"""
+    return _model is not None
+
+
+def detect_language(audio, model=None) -> str:
+    """Idioma dos primeiros 30s do PCM (uma passagem do encoder, sem transcrever)"""
+    model = _model if model is None else model
+    if not model.is_multilingual:
+        return "en"
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def transcribe_chunk(audio, start: float, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcreve o PCM de um bloco que começa em `start`, com timestamps absolutos"""
+    result = _model.transcribe(audio, **options)
+
+    return {
+        'language': result.get('language'),
+        'segments': offset_segments(result.get('segments', []), start)
+    }
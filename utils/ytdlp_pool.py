@@ -0,0 +1,122 @@
+import queue
+import threading
+import yt_dlp
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+from config.logging import logger
+
+
+class YoutubeDLPool:
+    """Pool de instâncias YoutubeDL pré-inicializadas, reutilizadas entre downloads
+
+    Cada instância guarda seus extratores já carregados (e o player JS em memória),
+    evitando a reinicialização a cada download. Opções específicas de cada chamada
+    (formato, outtmpl, hooks, limite de banda) são aplicadas na retirada e desfeitas
+    na devolução.
+    """
+
+    def __init__(self, base_options: Dict[str, Any], size: int = 4):
+        self.base_options = base_options
+        self.size = max(size, 1)
+        self._idle: "queue.LifoQueue[yt_dlp.YoutubeDL]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self) -> yt_dlp.YoutubeDL:
+        ydl = yt_dlp.YoutubeDL(dict(self.base_options))
+        # Inicializa o extrator do YouTube antecipadamente
+        ydl.get_info_extractor('Youtube')
+        return ydl
+
+    def _checkout(self) -> yt_dlp.YoutubeDL:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool cheio: aguarda uma instância ser devolvida
+        return self._idle.get()
+
+    @staticmethod
+    def _build_format_selector(ydl: yt_dlp.YoutubeDL, format_spec):
+        """Mesma regra do YoutubeDL.__init__ para params['format']"""
+        if format_spec in (None, '-') or callable(format_spec):
+            return format_spec
+        return ydl.build_format_selector(format_spec)
+
+    @contextmanager
+    def acquire(self, overrides: Optional[Dict[str, Any]] = None) -> Iterator[yt_dlp.YoutubeDL]:
+        """Retira uma instância com opções sobrescritas apenas durante o uso"""
+        ydl = self._checkout()
+        saved_params = dict(ydl.params)
+        saved_hooks = list(ydl._progress_hooks)
+        saved_selector = ydl.format_selector
+
+        try:
+            for key, value in (overrides or {}).items():
+                if key == 'progress_hooks':
+                    ydl._progress_hooks = list(value)
+                elif key == 'outtmpl':
+                    outtmpl = value if isinstance(value, dict) else {'default': value}
+                    ydl.params['outtmpl'] = {**saved_params.get('outtmpl', {}), **outtmpl}
+                else:
+                    ydl.params[key] = value
+                    if key == 'format':
+                        # O seletor de formato é compilado apenas no __init__ do YoutubeDL
+                        ydl.format_selector = self._build_format_selector(ydl, value)
+
+            yield ydl
+        finally:
+            ydl.params.clear()
+            ydl.params.update(saved_params)
+            ydl._progress_hooks = saved_hooks
+            ydl.format_selector = saved_selector
+            self._idle.put(ydl)
+
+    def warm_up(self) -> int:
+        """Cria todas as instâncias do pool antecipadamente"""
+        instances = []
+        try:
+            while len(instances) < self.size:
+                with self._lock:
+                    if self._created >= self.size:
+                        break
+                    self._created += 1
+                try:
+                    instances.append(self._create())
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        except Exception as e:
+            logger.warning(f"Falha ao pré-inicializar instâncias do yt-dlp: {e}")
+        finally:
+            for ydl in instances:
+                self._idle.put(ydl)
+
+        logger.info(f"Pool do yt-dlp pronto: {self._created} instâncias")
+        return len(instances)
+
+    def close(self) -> None:
+        """Fecha as instâncias ociosas"""
+        while True:
+            try:
+                ydl = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            ydl.close()
+            with self._lock:
+                self._created -= 1
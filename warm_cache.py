@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Script para pré-aquecer os caches de download (e opcionalmente de transcrição)
+
+Lê uma lista de video_ids ou buscas (um por linha) e baixa cada item direto no
+layout de cache do servidor (temp/ + índice em cache/downloads), usando vários
+processos em paralelo. O progresso é salvo em um arquivo de estado, então uma
+execução interrompida pode ser retomada com o mesmo comando.
+
+Exemplos:
+    python warm_cache.py musicas.txt
+    python warm_cache.py musicas.txt --transcribe --workers 4 --rate-limit 2048
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def parse_args():
+    """Lê argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description="Pré-aquece os caches de download e transcrição da ShortTune API")
+    parser.add_argument("input", help="Arquivo com um video_id ou termo de busca por linha")
+    parser.add_argument("--format", default="mp3", help="Formato de áudio (mp3, wav, opus, m4a, native)")
+    parser.add_argument("--quality", default="master", help="Qualidade (transcribe, preview, master)")
+    parser.add_argument("--transcribe", action="store_true", help="Também preenche o cache de transcrições")
+    parser.add_argument("--engine", default="local", help="Engine de transcrição (local, openai)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos em paralelo (padrão: núcleos)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Banda máxima por download em KB/s (0 = sem limite)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Pausa em segundos após cada item, por processo")
+    parser.add_argument("--keep-hours", type=float, default=72.0, help="Horas em que os arquivos ficam protegidos da limpeza")
+    parser.add_argument("--state", default="cache/warm_state.json", help="Arquivo de estado para retomar execuções")
+    return parser.parse_args()
+
+
+def load_items(input_file: str):
+    """Lê itens do arquivo de entrada (ignora linhas vazias, comentários e duplicados)"""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
+
+
+def load_state(state_file: str) -> dict:
+    """Carrega estado de uma execução anterior"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state_file: str, state: dict):
+    """Salva estado de forma atômica"""
+    Path(state_file).parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, state_file)
+
+
+def init_worker(rate_limit_kbps: int):
+    """Inicializa processo de trabalho (um núcleo por processo)"""
+    # Evita que cada processo use todos os núcleos (ou réplicas extras) no Whisper
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("TRANSCRIPTION_MAX_CONCURRENCY", "1")
+    os.environ.setdefault("TRANSCRIPTION_CHUNK_WORKERS", "1")
+
+    from services.download_service import download_service
+    if rate_limit_kbps:
+        download_service.download_options['ratelimit'] = rate_limit_kbps * 1024
+
+
+def warm_item(item: str, options: dict) -> dict:
+    """Executa o aquecimento de um item no processo de trabalho"""
+    try:
+        result = asyncio.run(_warm_item(item, options))
+    except Exception as e:
+        result = {'status': 'failed', 'error': str(e)}
+
+    if options['delay']:
+        time.sleep(options['delay'])
+    return result
+
+
+async def _warm_item(item: str, options: dict) -> dict:
+    """Resolve o item, baixa o áudio e opcionalmente transcreve"""
+    from models.schemas import AudioFormat, AudioQuality, TranscriptionEngine
+    from services.download_service import download_service, DownloadPriority
+    from services.youtube_music_service import youtube_music_service
+    from services.transcription_service import transcription_service
+
+    video_id = item
+    if not VIDEO_ID_PATTERN.match(item):
+        results = await youtube_music_service.search_songs(item, limit=1)
+        if not results:
+            return {'status': 'failed', 'error': 'Nenhum resultado para a busca'}
+        video_id = results[0].video_id
+
+    format = AudioFormat(options['format'])
+    metadata = await download_service.get_video_metadata(video_id)
+    is_valid, error_code, error_msg = download_service.validate_metadata(metadata, format)
+    if not is_valid:
+        return {'status': 'failed', 'video_id': video_id, 'error': f"{error_code}: {error_msg}"}
+
+    result = await download_service.download_audio(
+        video_id,
+        format,
+        quality=AudioQuality(options['quality']),
+        priority=DownloadPriority.BATCH
+    )
+    if not result:
+        return {'status': 'failed', 'video_id': video_id, 'error': 'Falha no download do áudio'}
+
+    # Protege o arquivo da limpeza automática até o lançamento
+    cache_key = f"{video_id}:{result['format'].value}:{result['quality'].value}"
+    download_service.store_download(cache_key, result, pinned_until=time.time() + options['keep_hours'] * 3600)
+
+    if options['transcribe']:
+        await transcription_service.transcribe_audio(
+            result['filepath'],
+            TranscriptionEngine(options['engine']),
+            video_id=video_id
+        )
+
+    return {'status': 'completed', 'video_id': video_id, 'filepath': result['filepath']}
+
+
+def main():
+    args = parse_args()
+
+    items = load_items(args.input)
+    state = load_state(args.state)
+    pending = [item for item in items if state.get(item, {}).get('status') != 'completed']
+
+    print("🎵 ShortTune API - Cache Warming")
+    print("=" * 50)
+    print(f"📋 Itens: {len(items)} ({len(items) - len(pending)} já concluídos, {len(pending)} pendentes)")
+    print(f"⚙️ Processos: {args.workers} | Banda: {args.rate_limit or 'sem limite'} KB/s | Transcrição: {args.transcribe}")
+    print("-" * 50)
+
+    options = {
+        'format': args.format,
+        'quality': args.quality,
+        'transcribe': args.transcribe,
+        'engine': args.engine,
+        'delay': args.delay,
+        'keep_hours': args.keep_hours
+    }
+
+    completed = failed = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max(args.workers, 1),
+            initializer=init_worker,
+            initargs=(args.rate_limit,)
+        ) as executor:
+            futures = {executor.submit(warm_item, item, options): item for item in pending}
+
+            for future in as_completed(futures):
+                item = futures[future]
+                result = future.result()
+                state[item] = result
+                save_state(args.state, state)
+
+                if result['status'] == 'completed':
+                    completed += 1
+                    print(f"✅ {item} -> {result['filepath']}")
+                else:
+                    failed += 1
+                    print(f"❌ {item}: {result.get('error')}")
+
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Interrompido pelo usuário. Execute novamente para retomar.")
+        sys.exit(1)
+
+    print("-" * 50)
+    print(f"🏁 Concluído: {completed} ok, {failed} falhas")
+    if failed:
+        print("Execute novamente para tentar os itens com falha.")
+
+
+if __name__ == "__main__":
+    main()